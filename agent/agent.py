@@ -1,6 +1,8 @@
 from dotenv import load_dotenv
 from utils.files import get_file_list
 from cache.state import RedisStateManager
+from models.schema import function_to_schema
+from functools import partial
 import datetime
 
 load_dotenv()
@@ -24,6 +26,23 @@ class Agent:
         self.personality = personality
         self.tools = tools
 
+    @property
+    def tools(self):
+        return self._tools
+
+    @tools.setter
+    def tools(self, tools):
+        """replacing the tool list is the only way to invalidate the schema cache"""
+        self._tools = tuple(tools)
+        self.tool_schemas = [function_to_schema(tool) for tool in self._tools]
+        self.tool_schema_map = {schema["name"]: schema for schema in self.tool_schemas}
+        self.tool_map = {}
+        for tool in self._tools:
+            if isinstance(tool, partial):
+                self.tool_map[tool.func.__name__] = tool
+            else:
+                self.tool_map[tool.__name__] = tool
+
     def get_claudes_files(self) -> str:
         """retrieve the list of files claude fetched from web, created"""
         try:
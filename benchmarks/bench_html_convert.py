@@ -0,0 +1,102 @@
+"""
+HtmlConverter engines over a corpus of saved pages: the html.parser path, and
+_convert_lxml with and without _main_content pruning. Also counts the pages
+where lxml without pruning does not reproduce the html.parser output exactly.
+
+    python -m benchmarks.bench_html_convert [saved pages or directories...]
+
+Without arguments, a synthetic corpus of navigation and ad heavy pages is used.
+"""
+
+import os
+import sys
+import time
+
+from browser._md_convert import HtmlConverter
+
+REPEATS = 3
+
+
+def _synthetic_page(i: int) -> str:
+    nav = "".join(f'<li><a href="/section/{n}">Section {n}</a></li>' for n in range(40))
+    paragraphs = "".join(
+        f"<p>Paragraph {n} of story {i} with <a href='/s/{n}'>a link</a>,"
+        f" <em>emphasis</em> and <code>code_{n}</code>.</p>"
+        for n in range(60)
+    )
+    related = "".join(
+        f'<div class="related-item"><a href="/r/{n}">Related {n}</a></div>'
+        for n in range(80)
+    )
+    return (
+        f"<html><head><title>Story {i}</title><script>window.state = {{}};</script>"
+        f"</head><body><header><nav><ul>{nav}</ul></nav></header>"
+        f"<div class='cookie-banner'>We use cookies</div>"
+        f"<article><h1>Story {i}</h1>{paragraphs}"
+        f"<table><tr><th>Key</th><th>Value</th></tr><tr><td>a</td><td>1</td></tr>"
+        f"</table></article><aside class='sidebar'>{related}</aside>"
+        f"<footer><ul>{nav}</ul></footer></body></html>"
+    )
+
+
+def _corpus(paths) -> dict:
+    if not paths:
+        return {f"synthetic-{i}": _synthetic_page(i) for i in range(20)}
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.lower().endswith((".html", ".htm"))
+            )
+        else:
+            files.append(path)
+    pages = {}
+    for path in files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages[path] = f.read()
+    return pages
+
+
+def _best_of(convert, pages: dict):
+    best, outputs = None, None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        results = {name: convert(html) for name, html in pages.items()}
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best, outputs = elapsed, results
+    return best, outputs
+
+
+def main(paths) -> None:
+    pages = _corpus(paths)
+    converter = HtmlConverter()
+    engines = (
+        ("html.parser", converter._convert),
+        ("lxml, no pruning", lambda html: converter._convert_lxml(html, False)),
+        ("lxml + main content", lambda html: converter._convert_lxml(html, True)),
+    )
+    size = sum(len(html.encode()) for html in pages.values())
+    print(f"{len(pages)} pages, {size / 2**20:.1f} MB of HTML, best of {REPEATS}")
+    print(f"{'engine':>20} {'seconds':>8} {'markdown MB':>12} {'differs':>8}")
+    baseline = None
+    for name, convert in engines:
+        seconds, results = _best_of(convert, pages)
+        markdown = sum(len(r.text_content.encode()) for r in results.values())
+        if baseline is None:
+            baseline, differs = results, "-"
+        elif name == "lxml, no pruning":
+            differs = sum(
+                (r.title, r.text_content)
+                != (baseline[page].title, baseline[page].text_content)
+                for page, r in results.items()
+            )
+        else:
+            differs = "-"
+        print(f"{name:>20} {seconds:>8.2f} {markdown / 2**20:>12.2f} {differs:>8}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,71 @@
+"""
+Per-turn cost of token_cutter over a growing history, with and without a
+TokenCountCache kept across turns (as run_claude_loop does).
+
+    python -m benchmarks.bench_token_cutter [history sizes...]
+"""
+
+import sys
+import time
+
+from utils.helpers import tokenizer
+from utils.tokenization import TokenCountCache, token_cutter
+
+TURNS = 5
+MAX_TOKENS = 60000
+
+
+def _history(size: int) -> list:
+    messages = []
+    for i in range(size):
+        if i % 4 == 2:
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": [
+                        {"type": "text", "text": f"Looking up item {i}."},
+                        {"type": "tool_use", "id": f"t{i}", "name": "kernel"},
+                    ],
+                }
+            )
+        elif i % 4 == 3:
+            messages.append(
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": f"t{i - 1}",
+                            "content": f"result {i} " * 30,
+                        }
+                    ],
+                }
+            )
+        else:
+            role = "user" if i % 4 == 0 else "assistant"
+            messages.append({"role": role, "content": f"message {i} " * 30})
+    return messages
+
+
+def _per_turn_ms(size: int, cached: bool) -> float:
+    messages = _history(size)
+    cache = TokenCountCache() if cached else None
+    token_cutter(messages, tokenizer, MAX_TOKENS, cache)
+    start = time.perf_counter()
+    for turn in range(TURNS):
+        messages.append({"role": "user", "content": f"new message {turn} " * 30})
+        token_cutter(messages, tokenizer, MAX_TOKENS, cache)
+    return (time.perf_counter() - start) * 1000 / TURNS
+
+
+def main(sizes) -> None:
+    print(f"{'messages':>10} {'uncached ms/turn':>18} {'cached ms/turn':>16}")
+    for size in sizes:
+        print(
+            f"{size:>10} {_per_turn_ms(size, False):>18.1f}"
+            f" {_per_turn_ms(size, True):>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000])
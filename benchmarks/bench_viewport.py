@@ -0,0 +1,104 @@
+"""
+Cost of splitting a large text page into SimpleTextBrowser viewports: the
+former character-by-character splitter against _viewport_bounds, which
+splits lazily, for the first viewport, ten page_downs and the whole page.
+
+    python -m benchmarks.bench_viewport [page sizes in MB...]
+"""
+
+import random
+import sys
+import tempfile
+import time
+
+from browser.simpletextbrowser import SimpleTextBrowser
+from cache.search_cache import SearchCache
+
+VIEWPORT_SIZE = 1024 * 8
+PAGE_DOWNS = 10
+
+
+def _prose(size: int) -> str:
+    rng = random.Random(0)
+    words = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(n))
+        for n in rng.choices(range(1, 12), k=5000)
+    ]
+    chunk = " ".join(rng.choices(words, k=20000)) + "\n"
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+def _long_tokens(size: int) -> str:
+    # base64-like lines much longer than a viewport, as in embedded data URIs
+    line = "A" * (3 * VIEWPORT_SIZE) + "\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def _eager_split(content: str, viewport_size: int) -> list:
+    """The splitter _viewport_bounds replaced, which split the whole page on load"""
+    pages = []
+    start_idx = 0
+    while start_idx < len(content):
+        end_idx = min(start_idx + viewport_size, len(content))
+        while end_idx < len(content) and content[end_idx - 1] not in [
+            " ",
+            "\t",
+            "\r",
+            "\n",
+        ]:
+            end_idx += 1
+        pages.append((start_idx, end_idx))
+        start_idx = end_idx
+    return pages
+
+
+def _ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def _run(name: str, content: str, browser: SimpleTextBrowser) -> None:
+    start = time.perf_counter()
+    expected = _eager_split(content, VIEWPORT_SIZE)
+    eager = _ms(start)
+
+    start = time.perf_counter()
+    browser.viewport_current_page = 0
+    browser._set_page_content(content)
+    browser.viewport
+    first = _ms(start)
+
+    start = time.perf_counter()
+    for _ in range(PAGE_DOWNS):
+        browser.page_down()
+        browser.viewport
+    paging = _ms(start)
+
+    start = time.perf_counter()
+    pages = browser.viewport_pages
+    whole = _ms(start)
+
+    assert pages == expected
+    print(
+        f"{name:>12} {len(content) / 2**20:>6.0f} {len(pages):>9}"
+        f" {eager:>10.1f} {first:>10.2f} {paging:>12.2f} {whole:>10.1f}"
+    )
+
+
+def main(sizes) -> None:
+    browser = SimpleTextBrowser(
+        viewport_size=VIEWPORT_SIZE,
+        request_kwargs={},
+        use_page_cache=False,
+        search_cache=SearchCache(cache_dir=tempfile.mkdtemp()),
+    )
+    print(
+        f"{'page':>12} {'MB':>6} {'viewports':>9} {'eager ms':>10}"
+        f" {'first ms':>10} {'10 pages ms':>12} {'whole ms':>10}"
+    )
+    for size in sizes:
+        for name, build in (("prose", _prose), ("long tokens", _long_tokens)):
+            _run(name, build(size * 2**20), browser)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [50])
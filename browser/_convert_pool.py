@@ -0,0 +1,204 @@
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+import multiprocessing
+import threading
+import signal
+import time
+import os
+
+# Worker processes for CPU-heavy conversions (0 converts on the calling thread),
+# conversions admitted at once (running + queued), and seconds before one is killed
+CONVERSION_WORKERS = int(
+    os.getenv("CONVERSION_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+CONVERSION_QUEUE_SIZE = int(
+    os.getenv("CONVERSION_QUEUE_SIZE", str(4 * max(CONVERSION_WORKERS, 1)))
+)
+CONVERSION_TIMEOUT = float(os.getenv("CONVERSION_TIMEOUT", "300"))
+# Smaller files are converted in-thread, where the worker round-trip is not worth it
+CONVERSION_POOL_MIN_BYTES = int(os.getenv("CONVERSION_POOL_MIN_BYTES", "262144"))
+
+POOLED_EXTENSIONS = {".pdf", ".docx", ".xlsx", ".xls", ".pptx"}
+
+_worker_converter = None
+
+
+def _convert_in_worker(path: str, kwargs: Dict[str, Any]):
+    """Runs in a worker process: convert a local file with a per-process converter"""
+    global _worker_converter
+    if _worker_converter is None:
+        from browser._md_convert import MarkdownConverter
+
+        _worker_converter = MarkdownConverter(use_conversion_pool=False)
+    return _worker_converter.convert_local(path, **kwargs)
+
+
+class ConversionTimeout(Exception):
+    pass
+
+
+def _report_pid(pids) -> None:
+    """Worker initializer: tell the pool which process to kill if a job overruns"""
+    pids.put(os.getpid())
+
+
+def _kill_workers(pids) -> None:
+    # ProcessPoolExecutor cannot stop a running job, so kill the worker processes
+    # that reported their pid. A job only starts in a worker that has reported
+    while not pids.empty():
+        try:
+            os.kill(pids.get(), signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+class ConversionPool:
+    """
+    Process pool for PDF / DOCX / XLSX / PPTX conversions, shared by every agent.
+
+    Conversions run in spawned worker processes, so several large documents use
+    several cores and do not hold the GIL of the main process. At most queue_size
+    jobs are admitted at once; further callers block until a slot frees up (or
+    their timeout passes). A job that runs past its timeout, or is cancelled while
+    running, cannot be interrupted inside a worker, so the workers are killed and
+    the pool restarted; other jobs lost with it are resubmitted once.
+    """
+
+    def __init__(
+        self,
+        workers: int = CONVERSION_WORKERS,
+        queue_size: int = CONVERSION_QUEUE_SIZE,
+        timeout: float = CONVERSION_TIMEOUT,
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Pids reported by the current executor's workers
+        self._worker_pids = None
+        self._generation = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats = {"completed": 0, "failed": 0, "timeouts": 0, "restarts": 0}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Conversion pool is shut down")
+            if self._executor is None:
+                context = multiprocessing.get_context("spawn")
+                self._worker_pids = context.SimpleQueue()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_report_pid,
+                    initargs=(self._worker_pids,),
+                )
+            return self._executor, self._generation
+
+    def _restart(self, generation: int) -> None:
+        """Kill the workers of the given pool generation (once) and start afresh"""
+        with self._lock:
+            if generation != self._generation or self._executor is None:
+                return
+            executor, self._executor = self._executor, None
+            pids, self._worker_pids = self._worker_pids, None
+            self._generation += 1
+            self._stats["restarts"] += 1
+        _kill_workers(pids)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, path: str, **kwargs: Any) -> Future:
+        """Start converting a file; the future resolves to a DocumentConverterResult"""
+        executor, generation = self._get_executor()
+        future = executor.submit(_convert_in_worker, path, kwargs)
+        future.generation = generation
+        return future
+
+    def cancel(self, future: Future) -> None:
+        """Cancel a submitted conversion, killing the workers if it already started"""
+        if not future.cancel() and not future.done():
+            self._restart(future.generation)
+
+    def convert(self, path: str, timeout: Optional[float] = None, **kwargs: Any):
+        """
+        Convert a local file in a worker, blocking until done or timed out.
+
+        The timeout covers the whole call: waiting for a slot, the conversion and
+        its resubmission after a pool restart all share one deadline.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            self._count("timeouts")
+            raise ConversionTimeout(
+                f"Conversion queue is full; gave up on {path} after {timeout}s"
+            )
+        try:
+            for attempt in range(2):
+                future = self.submit(path, **kwargs)
+                try:
+                    result = future.result(timeout=max(deadline - time.monotonic(), 0))
+                except TimeoutError:
+                    self._count("timeouts")
+                    self.cancel(future)
+                    raise ConversionTimeout(
+                        f"Converting {path} took longer than {timeout}s"
+                    )
+                except (BrokenProcessPool, CancelledError):
+                    # Lost with a pool that was restarted for another job
+                    self._restart(future.generation)
+                    if attempt == 0:
+                        continue
+                    self._count("failed")
+                    raise
+                except BaseException:
+                    self._count("failed")
+                    raise
+                self._count("completed")
+                return result
+        finally:
+            self._slots.release()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self) -> None:
+        """Stop the workers, cancelling queued and running conversions"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            pids, self._worker_pids = self._worker_pids, None
+            self._generation += 1
+            self._closed = True
+        if executor is not None:
+            _kill_workers(pids)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_conversion_pool: Optional[ConversionPool] = None
+_conversion_pool_lock = threading.Lock()
+
+
+def get_conversion_pool() -> Optional[ConversionPool]:
+    """Process-wide conversion pool, or None when CONVERSION_WORKERS is 0"""
+    global _conversion_pool
+    if CONVERSION_WORKERS < 1:
+        return None
+    with _conversion_pool_lock:
+        if _conversion_pool is None:
+            _conversion_pool = ConversionPool()
+    return _conversion_pool
+
+
+def shutdown_conversion_pool() -> None:
+    global _conversion_pool
+    with _conversion_pool_lock:
+        if _conversion_pool is not None:
+            _conversion_pool.shutdown()
+            _conversion_pool = None
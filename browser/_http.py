@@ -0,0 +1,113 @@
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+from typing import Optional
+import threading
+import requests
+import os
+
+# Hosts whose pools are kept alive, and connections kept (and allowed) per host
+POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "64"))
+PER_HOST_CONNECTIONS = int(os.getenv("HTTP_PER_HOST_CONNECTIONS", "4"))
+# Seconds to connect / read when the caller passes no timeout, and seconds to
+# wait for a free connection when a host's pool is full
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "30"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class _BoundedWaitHTTPPool(HTTPConnectionPool):
+    # requests never passes pool_timeout, which makes a blocking pool wait forever
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(HTTP_POOL_TIMEOUT if timeout is None else timeout)
+
+
+class _BoundedWaitHTTPSPool(HTTPSConnectionPool):
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(HTTP_POOL_TIMEOUT if timeout is None else timeout)
+
+
+class _PooledAdapter(HTTPAdapter):
+    """Adapter with a default timeout and a bounded wait for a pooled connection"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _BoundedWaitHTTPPool,
+            "https": _BoundedWaitHTTPSPool,
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        try:
+            return super().send(request, timeout=timeout, **kwargs)
+        except EmptyPoolError as e:
+            raise requests.ConnectionError(e, request=request)
+
+
+class _PerRequestCookieSession(requests.Session):
+    """
+    Session whose cookie jar lasts for one top-level request on one thread.
+
+    Cookies set along a redirect chain are sent on the following hops, then
+    dropped when the request returns, so agents do not leak state into each other.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        super().__init__()
+
+    @property
+    def cookies(self):
+        jar = getattr(self._local, "jar", None)
+        if jar is None:
+            jar = self._local.jar = RequestsCookieJar()
+        return jar
+
+    @cookies.setter
+    def cookies(self, jar):
+        self._local.jar = jar
+
+    def request(self, *args, **kwargs):
+        self._local.jar = RequestsCookieJar()
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            self._local.jar = RequestsCookieJar()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Process-wide keep-alive session shared by every browser, converter and web tool.
+
+    Repeat visits to a host reuse pooled connections (no TCP/TLS setup). The
+    per-host pool blocks when full, for at most HTTP_POOL_TIMEOUT seconds, so
+    callers must consume or close responses. Requests without a timeout get
+    the default one. Cookies only live for one request and its redirects.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = _PerRequestCookieSession()
+            adapter = _PooledAdapter(
+                pool_connections=POOL_HOSTS,
+                pool_maxsize=PER_HOST_CONNECTIONS,
+                pool_block=True,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+def close_http_session() -> None:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
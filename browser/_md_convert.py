@@ -1,31 +1,102 @@
 from urllib.parse import parse_qs, quote, unquote, urlparse, urlunparse
 from youtube_transcript_api.formatters import SRTFormatter
 from youtube_transcript_api import YouTubeTranscriptApi
-from typing import Any, Dict, List, Optional, Union
+from pdfminer.converter import TextConverter
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.layout import LAParams
+from pdfminer.pdfpage import PDFPage
+from pandas.io.formats.format import DataFrameFormatter
+from pandas.io.parsers.readers import STR_NA_VALUES
+from pandas.io.parsers import TextParser
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from models.anthropic import model_call
+from browser._convert_pool import (
+    CONVERSION_POOL_MIN_BYTES,
+    POOLED_EXTENSIONS,
+    ConversionPool,
+    get_conversion_pool,
+)
+from utils.helpers import tokenizer
+from collections import OrderedDict, deque
 from bs4 import BeautifulSoup
 import pdfminer.high_level
 import pandas as pd
 import markdownify
+import openpyxl
+import lxml.etree
+import lxml.html
 import subprocess
+import threading
 import traceback
 import puremagic
 import mimetypes
 import tempfile
+import datetime
 import requests
 import pdfminer
 import asyncio
 import mammoth
 import base64
 import shutil
-import copy
 import html
 import json
 import pptx
+import io
 import os
 import re
 import sys
 
+# Bump whenever conversion output changes, so cached markdown is regenerated
+CONVERTER_VERSION = 3
+
+# Downloaded bodies up to this size are converted in memory; larger ones go to a temp file
+CONVERT_IN_MEMORY_MAX_BYTES = int(
+    os.getenv("CONVERT_IN_MEMORY_MAX_BYTES", str(16 * 1024 * 1024))
+)
+
+# Local PDFs whose extracted pages are kept, so later page ranges skip earlier pages
+PDF_PAGE_CACHE_FILES = int(os.getenv("PDF_PAGE_CACHE_FILES", "16"))
+
+# Rows and columns written per spreadsheet sheet, and the file size from which .xlsx
+# files are streamed with openpyxl in read-only mode instead of loaded with pandas
+XLSX_MAX_ROWS = int(os.getenv("XLSX_MAX_ROWS", "2000"))
+XLSX_MAX_COLS = int(os.getenv("XLSX_MAX_COLS", "50"))
+XLSX_STREAM_MIN_BYTES = int(os.getenv("XLSX_STREAM_MIN_BYTES", str(5 * 1024 * 1024)))
+# Rows shown at each end of a sheet in summary mode
+XLSX_SUMMARY_ROWS = 5
+
+# HTML engine: "html.parser" (pure Python, default) or "lxml", which prunes the
+# page in C before markdownify. With lxml, navigation, footers, sidebars and ads
+# are also dropped (main-content extraction) unless HTML_MAIN_CONTENT=0
+HTML_ENGINE = os.getenv("HTML_ENGINE", "html.parser")
+HTML_MAIN_CONTENT = os.getenv("HTML_MAIN_CONTENT", "1") == "1"
+
+_BOILERPLATE_TAGS = [
+    "nav",
+    "footer",
+    "aside",
+    "noscript",
+    "form",
+    "iframe",
+    "svg",
+    "button",
+    "template",
+]
+_BOILERPLATE_ROLES = {
+    "navigation",
+    "banner",
+    "contentinfo",
+    "complementary",
+    "search",
+    "dialog",
+}
+_BOILERPLATE_NAMES = re.compile(
+    r"(?:^|[-_\s])(?:nav|navbar|menu|footer|sidebar|cookies?|banner|advert\w*|ads?"
+    r"|promo\w*|social|share|sharing|related|comments?|breadcrumbs?|newsletter"
+    r"|popup|modal|subscribe)(?:[-_\s]|$)",
+    re.IGNORECASE,
+)
+
 
 class _CustomMarkdownify(markdownify.MarkdownConverter):
     """
@@ -129,11 +200,210 @@ class DocumentConverterResult:
     def __init__(self, title: Union[str, None] = None, text_content: str = ""):
         self.title: Union[str, None] = title
         self.text_content: str = text_content
+        # Paged documents (PDF): the 1-based pages extracted, and the document's total
+        self.page_range: Optional[Tuple[int, int]] = None
+        self.page_count: Optional[int] = None
+        # Why the conversion failed, None on success (failed results must not be cached)
+        self.error: Optional[str] = None
+
+
+def _is_boilerplate(elm: Any) -> bool:
+    if (elm.get("role") or "").lower() in _BOILERPLATE_ROLES:
+        return True
+    names = (elm.get("class") or "") + " " + (elm.get("id") or "")
+    return bool(_BOILERPLATE_NAMES.search(names))
+
+
+def _main_content(tree: Any) -> Any:
+    """
+    The lxml element holding the page's main content, with boilerplate dropped.
+
+    Prefers <main> / role=main, then a lone <article>, then <body>. Navigation,
+    footers, sidebars, forms, ads and similar blocks inside it are removed.
+    """
+    roots = tree.xpath("//main | //*[@role='main']")
+    if roots:
+        root = roots[0]
+    else:
+        articles = tree.xpath("//article")
+        if len(articles) == 1:
+            root = articles[0]
+        else:
+            # Frameset and other body-less documents
+            root = tree.body if tree.body is not None else tree
+
+    boilerplate = root.xpath(" | ".join(f".//{tag}" for tag in _BOILERPLATE_TAGS))
+    boilerplate += [
+        elm
+        for elm in root.xpath(".//*[@class or @id or @role]")
+        if _is_boilerplate(elm)
+    ]
+    if root.tag == "body":
+        # Site headers, unless they belong to an article
+        boilerplate += [
+            h for h in root.iter("header") if not list(h.iterancestors("article"))
+        ]
+    for elm in boilerplate:
+        if elm.getparent() is not None:
+            elm.drop_tree()
+    return root
+
+
+def _md_cell(value: str) -> str:
+    """A table cell as markdownify writes it: whitespace collapsed, * and _ escaped"""
+    value = re.sub(r"[\t \r\n]+", " ", value).strip()
+    return value.replace("*", r"\*").replace("_", r"\_")
+
+
+def _markdown_table(header: List[str], rows: Iterable[List[str]]) -> Iterator[str]:
+    """Lines of a markdown table, written row by row"""
+    yield "| " + " | ".join(_md_cell(h) for h in header) + " |"
+    yield "| " + " | ".join("---" for _ in header) + " |"
+    for row in rows:
+        yield "| " + " | ".join(_md_cell(c) for c in row) + " |"
+
+
+def _cell_str(value: Any) -> str:
+    """A cell read by openpyxl, written as pandas would show it"""
+    return "NaN" if value is None else str(value)
+
+
+def _dtype_sample_key(value: Any) -> Any:
+    """Cells (as _excel_cell returns them) that pandas' inference treats alike share a key"""
+    if isinstance(value, str):
+        if value in STR_NA_VALUES:
+            return None
+        try:
+            float(value)
+            return (str, "number")
+        except ValueError:
+            return (str, "text")
+    return type(value)
+
+
+def _excel_cell(value: Any) -> Any:
+    """A cell read by openpyxl, converted as pandas.read_excel converts it"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _pandas_dtypes(header: List[str], samples: List[Dict[Any, Any]]) -> List[str]:
+    """
+    The dtypes pandas.read_excel gives the columns of a streamed sheet.
+
+    samples holds one cell per kind of value seen in each column (see
+    _dtype_sample_key), which is all pandas' inference depends on, so parsing
+    those few cells with pandas' own parser gives the full sheet's dtypes.
+    """
+    columns = [list(sample.values()) for sample in samples]
+    depth = max((len(column) for column in columns), default=0)
+    rows = [
+        [column[min(k, len(column) - 1)] for column in columns] for k in range(depth)
+    ]
+    df = TextParser([header] + rows, header=0, skip_blank_lines=False).read()
+    return [str(dtype) for dtype in df.dtypes]
+
+
+class _DocumentSource:
+    """
+    The document being converted, read and parsed at most once per conversion.
+
+    Backed either by a local file or by an in-memory body (e.g. a downloaded
+    page). In-memory documents are only written to a temporary file if a
+    converter needs a real path, and close() removes that file.
+
+    MarkdownConverter._convert passes one instance to every converter it tries as
+    the `document_source` kwarg. Converters may only remove script/style elements
+    from the shared soup.
+    """
+
+    def __init__(self, local_path: Optional[str] = None, data: Optional[bytes] = None):
+        self.local_path = local_path
+        self._bytes: Optional[bytes] = data
+        self._text: Optional[str] = None
+        self._soups: Dict[str, BeautifulSoup] = {}
+        self._spill_path: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.local_path or "<in-memory document>"
+
+    def bytes(self) -> bytes:
+        if self._bytes is None:
+            with open(self.local_path, "rb") as fh:
+                self._bytes = fh.read()
+        return self._bytes
+
+    def open(self) -> BinaryIO:
+        """A binary file object over the document, without copying in-memory data"""
+        if self.local_path is not None and self._bytes is None:
+            return open(self.local_path, "rb")
+        return io.BytesIO(self._bytes)
+
+    def size(self) -> int:
+        if self._bytes is None:
+            return os.path.getsize(self.local_path)
+        return len(self._bytes)
+
+    def path(self) -> str:
+        """A path to the document on disk, spilling in-memory data if needed"""
+        if self.local_path is not None:
+            return self.local_path
+        if self._spill_path is None:
+            handle, self._spill_path = tempfile.mkstemp()
+            with os.fdopen(handle, "wb") as fh:
+                fh.write(self._bytes)
+        return self._spill_path
+
+    def text(self) -> str:
+        """The document decoded as UTF-8 text, with newlines translated like open(..., "rt")"""
+        if self._text is None:
+            self._text = io.TextIOWrapper(
+                io.BytesIO(self.bytes()), encoding="utf-8"
+            ).read()
+        return self._text
+
+    def soup(self, parser: str = "html.parser") -> BeautifulSoup:
+        if parser not in self._soups:
+            self._soups[parser] = BeautifulSoup(self.text(), parser)
+        return self._soups[parser]
+
+    def close(self) -> None:
+        if self._spill_path is not None:
+            try:
+                os.unlink(self._spill_path)
+            except FileNotFoundError:
+                pass
+            self._spill_path = None
+
+
+def _document_source(
+    local_path: Optional[str], kwargs: Dict[str, Any]
+) -> _DocumentSource:
+    """The shared source for this conversion, or a private one for direct calls"""
+    source = kwargs.get("document_source")
+    if source is None or (local_path is not None and source.local_path != local_path):
+        source = _DocumentSource(local_path)
+    return source
 
 
 class DocumentConverter:
     """Abstract superclass of all DocumentConverters."""
 
+    # Built-in converters read through the shared document_source kwarg and may be
+    # called with local_path=None for in-memory documents; others get a real path
+    reads_source = False
+
+    def accepts(self, **kwargs: Any) -> bool:
+        """
+        Cheap check on file_extension / content_type / url, done before the file is
+        touched. Converters that can only tell from the content return True.
+        """
+        return True
+
     def convert(
         self, local_path: str, **kwargs: Any
     ) -> Union[None, DocumentConverterResult]:
@@ -143,37 +413,40 @@ class DocumentConverter:
 class PlainTextConverter(DocumentConverter):
     """Anything with content type text/plain"""
 
-    def convert(
-        self, local_path: str, **kwargs: Any
-    ) -> Union[None, DocumentConverterResult]:
+    reads_source = True
+
+    def accepts(self, **kwargs: Any) -> bool:
         # Guess the content type from file extension
         content_type, _ = mimetypes.guess_type(
             "__placeholder" + kwargs.get("file_extension", "")
         )
 
         # Only accept actual text files
-        if content_type is None:
-            return None
-        elif "text/" not in content_type.lower():
+        return content_type is not None and "text/" in content_type.lower()
+
+    def convert(
+        self, local_path: str, **kwargs: Any
+    ) -> Union[None, DocumentConverterResult]:
+        if not self.accepts(**kwargs):
             return None
 
         # Try to detect if file is binary before opening as text
         try:
+            source = _document_source(local_path, kwargs)
+
             # Check first few bytes for binary content
-            with open(local_path, "rb") as f:
-                chunk = f.read(1024)
-                if b"\0" in chunk:  # Null bytes suggest binary content
-                    return None
+            chunk = source.bytes()[:1024]
+            if b"\0" in chunk:  # Null bytes suggest binary content
+                return None
 
-                # Check if the content can be decoded as UTF-8
-                try:
-                    chunk.decode("utf-8")
-                except UnicodeDecodeError:
-                    return None
+            # Check if the content can be decoded as UTF-8
+            try:
+                chunk.decode("utf-8")
+            except UnicodeDecodeError:
+                return None
 
             # If we get here, file appears to be text
-            with open(local_path, "rt", encoding="utf-8") as fh:
-                text_content = fh.read()
+            text_content = source.text()
             return DocumentConverterResult(
                 title=None,
                 text_content=text_content,
@@ -185,30 +458,34 @@ class PlainTextConverter(DocumentConverter):
 class HtmlConverter(DocumentConverter):
     """Anything with content type text/html"""
 
-    def convert(
-        self, local_path: str, **kwargs: Any
-    ) -> Union[None, DocumentConverterResult]:
+    reads_source = True
+
+    def accepts(self, **kwargs: Any) -> bool:
         extension = kwargs.get("file_extension", "")
         content_type = kwargs.get("content_type", "").lower()
 
-        is_html = (extension.lower() in [".html", ".htm"]) or (
-            "text/html" in content_type
-        )
-        if not is_html:
-            return None
+        return (extension.lower() in [".html", ".htm"]) or ("text/html" in content_type)
 
-        result = None
-        with open(local_path, "rt", encoding="utf-8") as fh:
-            result = self._convert(fh.read())
+    def convert(
+        self, local_path: str, **kwargs: Any
+    ) -> Union[None, DocumentConverterResult]:
+        if not self.accepts(**kwargs):
+            return None
 
-        return result
+        source = _document_source(local_path, kwargs)
+        if kwargs.get("html_parser") == "lxml":
+            return self._convert_lxml(source.text(), kwargs.get("main_content", True))
+        return self._convert_soup(source.soup())
 
     def _convert(self, html_content: str) -> Union[None, DocumentConverterResult]:
         """Helper function that converts and HTML string."""
 
         # Parse the string
-        soup = BeautifulSoup(html_content, "html.parser")
+        return self._convert_soup(BeautifulSoup(html_content, "html.parser"))
 
+    def _convert_soup(
+        self, soup: BeautifulSoup
+    ) -> Union[None, DocumentConverterResult]:
         # Remove javascript and style blocks
         for script in soup(["script", "style"]):
             script.extract()
@@ -228,25 +505,59 @@ class HtmlConverter(DocumentConverter):
             text_content=webpage_text,
         )
 
+    def _convert_lxml(
+        self, html_content: str, main_content: bool = True
+    ) -> Union[None, DocumentConverterResult]:
+        """lxml engine: prune the tree in C, then markdownify only what is left."""
+        try:
+            tree = lxml.html.document_fromstring(html_content)
+        except (lxml.etree.ParserError, ValueError):
+            # Empty documents, or str input with an encoding declaration
+            return self._convert(html_content)
+
+        if not main_content:
+            # Same tree walk as html.parser, so the same markdown
+            soup = BeautifulSoup(lxml.html.tostring(tree, encoding="unicode"), "lxml")
+            return self._convert_soup(soup)
+
+        title_elm = tree.find(".//title")
+        lxml.etree.strip_elements(
+            tree, "script", "style", lxml.etree.Comment, with_tail=False
+        )
+        root = _main_content(tree)
+        soup = BeautifulSoup(lxml.html.tostring(root, encoding="unicode"), "lxml")
+        body_elm = soup.find("body")
+        webpage_text = _CustomMarkdownify().convert_soup(body_elm if body_elm else soup)
+
+        return DocumentConverterResult(
+            title=None if title_elm is None else title_elm.text,
+            text_content=webpage_text,
+        )
+
 
 class WikipediaConverter(DocumentConverter):
     """Handle Wikipedia pages separately, focusing only on the main document content."""
 
+    reads_source = True
+
+    def accepts(self, **kwargs: Any) -> bool:
+        extension = kwargs.get("file_extension", "")
+        if extension.lower() not in [".html", ".htm"]:
+            return False
+        url = kwargs.get("url", "")
+        return bool(re.search(r"^https?:\/\/[a-zA-Z]{2,3}\.wikipedia.org\/", url))
+
     def convert(
         self, local_path: str, **kwargs: Any
     ) -> Union[None, DocumentConverterResult]:
         # Bail if not Wikipedia
-        extension = kwargs.get("file_extension", "")
-        if extension.lower() not in [".html", ".htm"]:
-            return None
-        url = kwargs.get("url", "")
-        if not re.search(r"^https?:\/\/[a-zA-Z]{2,3}\.wikipedia.org\/", url):
+        if not self.accepts(**kwargs):
             return None
 
         # Parse the file
-        soup = None
-        with open(local_path, "rt", encoding="utf-8") as fh:
-            soup = BeautifulSoup(fh.read(), "html.parser")
+        soup = _document_source(local_path, kwargs).soup(
+            kwargs.get("html_parser", "html.parser")
+        )
 
         # Remove javascript and style blocks
         for script in soup(["script", "style"]):
@@ -281,21 +592,26 @@ class WikipediaConverter(DocumentConverter):
 class YouTubeConverter(DocumentConverter):
     """Handle YouTube specially, focusing on the video title, description, and transcript."""
 
+    reads_source = True
+
+    def accepts(self, **kwargs: Any) -> bool:
+        extension = kwargs.get("file_extension", "")
+        if extension.lower() not in [".html", ".htm"]:
+            return False
+        return kwargs.get("url", "").startswith("https://www.youtube.com/watch?")
+
     def convert(
         self, local_path: str, **kwargs: Any
     ) -> Union[None, DocumentConverterResult]:
         # Bail if not YouTube
-        extension = kwargs.get("file_extension", "")
-        if extension.lower() not in [".html", ".htm"]:
+        if not self.accepts(**kwargs):
             return None
         url = kwargs.get("url", "")
-        if not url.startswith("https://www.youtube.com/watch?"):
-            return None
 
         # Parse the file
-        soup = None
-        with open(local_path, "rt", encoding="utf-8") as fh:
-            soup = BeautifulSoup(fh.read(), "html.parser")
+        soup = _document_source(local_path, kwargs).soup(
+            kwargs.get("html_parser", "html.parser")
+        )
 
         # Read the meta tags
         assert soup.title is not None and soup.title.string is not None
@@ -408,18 +724,108 @@ class YouTubeConverter(DocumentConverter):
 class PdfConverter(DocumentConverter):
     """
     Converts PDFs to Markdown. Most style information is ignored, so the results are essentially plain-text.
+
+    Pages are extracted one at a time. A `page_range` kwarg ((first, last), 1-based,
+    inclusive, last may be None) limits extraction to those pages, and a `max_tokens`
+    kwarg stops it after the page that fills the budget. Pages of local files are
+    cached by (path, size, mtime), so reading on from a later page is cheap.
     """
 
+    reads_source = True
+
+    _page_cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+    _page_cache_lock = threading.Lock()
+
+    def accepts(self, **kwargs: Any) -> bool:
+        return kwargs.get("file_extension", "").lower() == ".pdf"
+
     def convert(self, local_path, **kwargs) -> Union[None, DocumentConverterResult]:
         # Bail if not a PDF
-        extension = kwargs.get("file_extension", "")
-        if extension.lower() != ".pdf":
+        if not self.accepts(**kwargs):
             return None
 
-        return DocumentConverterResult(
+        page_range = kwargs.get("page_range")
+        max_tokens = kwargs.get("max_tokens")
+        if page_range is None and max_tokens is None:
+            with _document_source(local_path, kwargs).open() as pdf_file:
+                text_content = pdfminer.high_level.extract_text(pdf_file)
+            return DocumentConverterResult(
+                title=None,
+                text_content=text_content,
+            )
+
+        first, last = page_range or (1, None)
+        first = max(first, 1)
+        entry = self._cached_pages(local_path)
+        with _document_source(local_path, kwargs).open() as pdf_file:
+            pages = self._extract_pages(pdf_file, first, last, max_tokens, entry)
+
+        res = DocumentConverterResult(
             title=None,
-            text_content=pdfminer.high_level.extract_text(local_path),
+            text_content="".join(pages),
         )
+        res.page_count = entry["count"]
+        if pages:
+            res.page_range = (first, first + len(pages) - 1)
+        return res
+
+    def _cached_pages(self, local_path: Optional[str]) -> Dict[str, Any]:
+        """Extracted pages of a local file ({"count": int, "pages": {index: text}})"""
+        if local_path is None:
+            return {"count": None, "pages": {}}
+        stat = os.stat(local_path)
+        key = (os.path.realpath(local_path), stat.st_size, stat.st_mtime_ns)
+        with self._page_cache_lock:
+            entry = self._page_cache.get(key)
+            if entry is None:
+                entry = self._page_cache[key] = {"count": None, "pages": {}}
+                while len(self._page_cache) > PDF_PAGE_CACHE_FILES:
+                    self._page_cache.popitem(last=False)
+            self._page_cache.move_to_end(key)
+        return entry
+
+    def _extract_pages(
+        self,
+        pdf_file: BinaryIO,
+        first: int,
+        last: Optional[int],
+        max_tokens: Optional[int],
+        entry: Dict[str, Any],
+    ) -> List[str]:
+        """
+        Text of pages first..last, extracted one page at a time like pdfminer's
+        extract_text and recorded in entry. Stops processing after the page that
+        reaches max_tokens; the rest of the page tree is only walked for the count.
+        """
+        cached = entry["pages"]
+        output = io.StringIO()
+        interpreter = None
+        pages: List[str] = []
+        tokens = 0
+        done = False
+        count = 0
+        for index, page in enumerate(PDFPage.get_pages(pdf_file), start=1):
+            count = index
+            if done or index < first or (last is not None and index > last):
+                if done and entry["count"] is not None:
+                    break
+                continue
+            if index not in cached:
+                if interpreter is None:
+                    rsrcmgr = PDFResourceManager(caching=True)
+                    device = TextConverter(rsrcmgr, output, laparams=LAParams())
+                    interpreter = PDFPageInterpreter(rsrcmgr, device)
+                output.seek(0)
+                output.truncate()
+                interpreter.process_page(page)
+                cached[index] = output.getvalue()
+            pages.append(cached[index])
+            if max_tokens is not None:
+                tokens += len(tokenizer.encode(cached[index]))
+                done = tokens >= max_tokens
+        else:
+            entry["count"] = count
+        return pages
 
 
 class DocxConverter(HtmlConverter):
@@ -427,14 +833,16 @@ class DocxConverter(HtmlConverter):
     Converts DOCX files to Markdown. Style information (e.g.m headings) and tables are preserved where possible.
     """
 
+    def accepts(self, **kwargs: Any) -> bool:
+        return kwargs.get("file_extension", "").lower() == ".docx"
+
     def convert(self, local_path, **kwargs) -> Union[None, DocumentConverterResult]:
         # Bail if not a DOCX
-        extension = kwargs.get("file_extension", "")
-        if extension.lower() != ".docx":
+        if not self.accepts(**kwargs):
             return None
 
         result = None
-        with open(local_path, "rb") as docx_file:
+        with _document_source(local_path, kwargs).open() as docx_file:
             result = mammoth.convert_to_html(docx_file)
             html_content = result.value
             result = self._convert(html_content)
@@ -445,41 +853,190 @@ class DocxConverter(HtmlConverter):
 class XlsxConverter(HtmlConverter):
     """
     Converts XLSX files to Markdown, with each sheet presented as a separate Markdown table.
+
+    Tables are written straight from the cells, at most XLSX_MAX_ROWS rows and
+    XLSX_MAX_COLS columns per sheet. .xlsx files of XLSX_STREAM_MIN_BYTES or more are
+    streamed row by row with openpyxl in read-only mode rather than loaded with
+    pandas. With the `spreadsheet_summary` kwarg, each sheet is described by its
+    shape, column types and first / last rows instead.
     """
 
+    def accepts(self, **kwargs: Any) -> bool:
+        return kwargs.get("file_extension", "").lower() in [".xlsx", ".xls"]
+
     def convert(self, local_path, **kwargs) -> Union[None, DocumentConverterResult]:
         # Bail if not a XLSX
-        extension = kwargs.get("file_extension", "")
-        if extension.lower() not in [".xlsx", ".xls"]:
+        if not self.accepts(**kwargs):
             return None
 
-        sheets = pd.read_excel(local_path, sheet_name=None)
-        md_content = ""
-        for s in sheets:
-            md_content += f"## {s}\n"
-            html_content = sheets[s].to_html(index=False)
-            md_content += self._convert(html_content).text_content.strip() + "\n\n"
+        source = _document_source(local_path, kwargs)
+        summary = bool(kwargs.get("spreadsheet_summary"))
+        if (
+            kwargs["file_extension"].lower() == ".xlsx"
+            and source.size() >= XLSX_STREAM_MIN_BYTES
+        ):
+            md_content = "".join(self._stream_sheets(source, summary))
+        else:
+            md_content = "".join(self._pandas_sheets(source, summary))
 
         return DocumentConverterResult(
             title=None,
             text_content=md_content.strip(),
         )
 
+    def _pandas_sheets(self, source: _DocumentSource, summary: bool) -> Iterator[str]:
+        with source.open() as xlsx_file:
+            sheets = pd.read_excel(xlsx_file, sheet_name=None)
+        for name, df in sheets.items():
+            yield f"## {name}\n"
+            if df.shape[1] == 0:
+                yield "\n\n"
+                continue
+            if summary:
+                yield self._summary(
+                    df.shape,
+                    [(str(c), str(t)) for c, t in df.dtypes.items()],
+                    [str(c) for c in df.columns],
+                    self._formatted_rows(df.head(XLSX_SUMMARY_ROWS)),
+                    self._formatted_rows(df.tail(XLSX_SUMMARY_ROWS)),
+                )
+                continue
+            shown = df.iloc[:XLSX_MAX_ROWS, :XLSX_MAX_COLS]
+            yield "\n".join(
+                _markdown_table(
+                    [str(c) for c in shown.columns], self._formatted_rows(shown)
+                )
+            )
+            yield self._truncation_note(df.shape, shown.shape) + "\n\n"
+
+    def _formatted_rows(self, df: pd.DataFrame) -> List[List[str]]:
+        """Cells formatted like DataFrame.to_html (NaN, float precision, dates)"""
+        if df.shape[1] == 0:
+            return [[] for _ in range(df.shape[0])]
+        formatter = DataFrameFormatter(df, index=False)
+        columns = [formatter.format_col(i) for i in range(df.shape[1])]
+        return [list(row) for row in zip(*columns)]
+
+    def _stream_sheets(self, source: _DocumentSource, summary: bool) -> Iterator[str]:
+        with source.open() as xlsx_file:
+            workbook = openpyxl.load_workbook(xlsx_file, read_only=True, data_only=True)
+            try:
+                for sheet in workbook.worksheets:
+                    yield f"## {sheet.title}\n"
+                    yield self._stream_sheet(sheet, summary)
+            finally:
+                workbook.close()
+
+    def _stream_sheet(self, sheet: Any, summary: bool) -> str:
+        rows = sheet.iter_rows(values_only=True)
+        first = next(rows, None)
+        if first is None:
+            return "\n\n"
+        header = [
+            f"Unnamed: {i}" if v is None else _cell_str(v) for i, v in enumerate(first)
+        ]
+        width = len(header)
+
+        if summary:
+            head: List[List[str]] = []
+            tail: deque = deque(maxlen=XLSX_SUMMARY_ROWS)
+            samples: List[Dict[Any, Any]] = [{} for _ in header]
+            count = 0
+            # Empty rows only count once a row with data follows, as pandas drops
+            # trailing empty rows
+            empty_rows = 0
+            for row in rows:
+                if all(v is None for v in row):
+                    empty_rows += 1
+                    continue
+                for row in [()] * empty_rows + [row]:
+                    count += 1
+                    values = list(row[:width]) + [None] * (width - len(row[:width]))
+                    for sample, v in zip(samples, values):
+                        cell = _excel_cell(v)
+                        sample.setdefault(_dtype_sample_key(cell), cell)
+                    cells = [_cell_str(v) for v in values]
+                    if len(head) < XLSX_SUMMARY_ROWS:
+                        head.append(cells)
+                    tail.append(cells)
+                empty_rows = 0
+            dtypes = list(zip(header, _pandas_dtypes(header, samples)))
+            return self._summary((count, width), dtypes, header, head, list(tail))
+
+        shown_width = min(width, XLSX_MAX_COLS)
+
+        def shown_rows():
+            for row in rows:
+                cells = [_cell_str(v) for v in row[:shown_width]]
+                yield cells + ["NaN"] * (shown_width - len(cells))
+
+        lines = list(
+            _markdown_table(
+                header[:shown_width],
+                (row for _, row in zip(range(XLSX_MAX_ROWS), shown_rows())),
+            )
+        )
+        shown = len(lines) - 2
+        # max_row comes from the sheet's stored dimensions, which may be missing
+        if sheet.max_row:
+            total = max(sheet.max_row - 1, shown)
+        else:
+            total = None if next(rows, None) is not None else shown
+        return (
+            "\n".join(lines)
+            + self._truncation_note((total, width), (shown, shown_width))
+            + "\n\n"
+        )
+
+    def _summary(
+        self,
+        shape: Tuple[int, int],
+        dtypes: List[Tuple[str, str]],
+        header: List[str],
+        head: List[List[str]],
+        tail: List[List[str]],
+    ) -> str:
+        lines = [f"Shape: {shape[0]} rows x {shape[1]} columns", ""]
+        lines += _markdown_table(["column", "dtype"], dtypes)
+        lines += ["", f"First {len(head)} rows:", ""]
+        lines += _markdown_table(header, head)
+        lines += ["", f"Last {len(tail)} rows:", ""]
+        lines += _markdown_table(header, tail)
+        return "\n".join(lines) + "\n\n"
+
+    def _truncation_note(
+        self, shape: Tuple[Optional[int], int], shown: Tuple[int, int]
+    ) -> str:
+        """Note on rows / columns left out; a row count of None means "more than shown" """
+        parts = []
+        if shape[0] is None:
+            parts.append(f"first {shown[0]} rows (the sheet has more)")
+        elif shown[0] < shape[0]:
+            parts.append(f"first {shown[0]} of {shape[0]} rows")
+        if shown[1] < shape[1]:
+            parts.append(f"first {shown[1]} of {shape[1]} columns")
+        if not parts:
+            return ""
+        return f"\n\n[Showing the {' and '.join(parts)}]"
+
 
 class PptxConverter(HtmlConverter):
     """
     Converts PPTX files to Markdown. Supports heading, tables and images with alt text.
     """
 
+    def accepts(self, **kwargs: Any) -> bool:
+        return kwargs.get("file_extension", "").lower() == ".pptx"
+
     def convert(self, local_path, **kwargs) -> Union[None, DocumentConverterResult]:
         # Bail if not a PPTX
-        extension = kwargs.get("file_extension", "")
-        if extension.lower() != ".pptx":
+        if not self.accepts(**kwargs):
             return None
 
         md_content = ""
 
-        presentation = pptx.Presentation(local_path)
+        with _document_source(local_path, kwargs).open() as pptx_file:
+            presentation = pptx.Presentation(pptx_file)
         slide_num = 0
         for slide in presentation.slides:
             slide_num += 1
@@ -565,6 +1122,8 @@ class MediaConverter(DocumentConverter):
     Abstract class for multi-modal media (e.g., images and audio)
     """
 
+    reads_source = True
+
     def _get_metadata(self, local_path):
         exiftool = shutil.which("exiftool")
         if not exiftool:
@@ -584,16 +1143,20 @@ class ImageConverter(MediaConverter):
     Converts images to markdown via extraction of metadata (if `exiftool` is installed), OCR (if `easyocr` is installed), and description via a multimodal LLM (if an mlm_client is configured).
     """
 
+    def accepts(self, **kwargs: Any) -> bool:
+        return kwargs.get("file_extension", "").lower() in [".jpg", ".jpeg", ".png"]
+
     def convert(self, local_path, **kwargs) -> Union[None, DocumentConverterResult]:
-        # Bail if not a XLSX
-        extension = kwargs.get("file_extension", "")
-        if extension.lower() not in [".jpg", ".jpeg", ".png"]:
+        # Bail if not an image
+        if not self.accepts(**kwargs):
             return None
+        extension = kwargs.get("file_extension", "")
 
         md_content = ""
+        source = _document_source(local_path, kwargs)
 
         # Add metadata
-        metadata = self._get_metadata(local_path)
+        metadata = self._get_metadata(source.path())
         if metadata:
             for f in [
                 "ImageSize",
@@ -612,7 +1175,7 @@ class ImageConverter(MediaConverter):
 
         md_content += (
             "\n# Description:\n"
-            + self._get_image_description(local_path, extension).strip()
+            + self._get_image_description(source, extension).strip()
             + "\n"
         )
 
@@ -621,13 +1184,10 @@ class ImageConverter(MediaConverter):
             text_content=md_content,
         )
 
-    def _get_image_description(self, local_path, extension):
+    def _get_image_description(self, source, extension):
         prompt = "Write a detailed caption for this image."
 
-        data_uri = ""
-        with open(local_path, "rb") as image_file:
-            image_base64 = base64.b64encode(image_file.read()).decode("utf-8")
-            data_uri = image_base64
+        data_uri = base64.b64encode(source.bytes()).decode("utf-8")
 
         response = asyncio.run(model_call(input=prompt, encoded_image=data_uri))
         return response.content[0].text
@@ -648,12 +1208,36 @@ class MarkdownConverter:
     def __init__(
         self,
         requests_session: Optional[requests.Session] = None,
+        html_engine: Optional[str] = None,
+        main_content: Optional[bool] = None,
+        conversion_pool: Optional[ConversionPool] = None,
+        use_conversion_pool: bool = True,
     ):
         if requests_session is None:
             self._requests_session = requests.Session()
         else:
             self._requests_session = requests_session
 
+        # Large PDF / Office files are converted in worker processes
+        if use_conversion_pool:
+            self._conversion_pool = (
+                conversion_pool
+                if conversion_pool is not None
+                else get_conversion_pool()
+            )
+        else:
+            self._conversion_pool = None
+
+        # How HTML is parsed / pruned (defaults from HTML_ENGINE / HTML_MAIN_CONTENT)
+        self._html_engine = html_engine or HTML_ENGINE
+        self._main_content = HTML_MAIN_CONTENT if main_content is None else main_content
+        # Identifies the output format, e.g. for cached conversions
+        self.version = str(CONVERTER_VERSION)
+        if self._html_engine != "html.parser":
+            self.version += f"-{self._html_engine}"
+            if self._main_content:
+                self.version += "-main"
+
         self._page_converters: List[DocumentConverter] = []
 
         # Register converters in order of specificity (most specific first)
@@ -709,6 +1293,20 @@ class MarkdownConverter:
         self._append_ext(extensions, ext)
         self._append_ext(extensions, self._guess_ext_magic(path))
 
+        # Hand CPU-heavy formats to the worker pool, which converts the file itself.
+        # Paged PDF reads stay here, next to PdfConverter's page cache: in a worker
+        # they would fill that worker's cache, which later pages rarely hit
+        paged_pdf = any(e.lower() == ".pdf" for e in extensions) and (
+            kwargs.get("page_range") is not None or kwargs.get("max_tokens") is not None
+        )
+        if (
+            self._conversion_pool is not None
+            and not paged_pdf
+            and any(e.lower() in POOLED_EXTENSIONS for e in extensions)
+            and os.path.getsize(path) >= CONVERSION_POOL_MIN_BYTES
+        ):
+            return self._conversion_pool.convert(path, **kwargs)
+
         # Convert
         return self._convert(path, extensions, **kwargs)
 
@@ -720,33 +1318,20 @@ class MarkdownConverter:
         ext = kwargs.get("file_extension")
         extensions = [ext] if ext is not None else []
 
-        # Save the file locally to a temporary file. It will be deleted before this method exits
-        handle, temp_path = tempfile.mkstemp()
-        fh = os.fdopen(handle, "wb")
-        result = None
+        # Convert straight from memory; converters that need a path get a temporary file
+        content = stream.read()
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        source = _DocumentSource(data=content)
         try:
-            # Write to the temporary file
-            content = stream.read()
-            if isinstance(content, str):
-                fh.write(content.encode("utf-8"))
-            else:
-                fh.write(content)
-            fh.close()
-
             # Use puremagic to check for more extension options
-            self._append_ext(extensions, self._guess_ext_magic(temp_path))
+            self._append_ext(extensions, self._guess_ext_magic(source))
 
             # Convert
-            result = self._convert(temp_path, extensions, **kwargs)
+            return self._convert(source, extensions, **kwargs)
         # Clean up
         finally:
-            try:
-                fh.close()
-            except Exception:
-                pass
-            os.unlink(temp_path)
-
-        return result
+            source.close()
 
     def convert_url(
         self, url: str, **kwargs: Any
@@ -756,8 +1341,11 @@ class MarkdownConverter:
         response = self._requests_session.get(
             url, stream=True, headers={"User-Agent": user_agent}
         )
-        response.raise_for_status()
-        return self.convert_response(response, **kwargs)
+        try:
+            response.raise_for_status()
+            return self.convert_response(response, **kwargs)
+        finally:
+            response.close()
 
     def convert_response(
         self, response: requests.Response, **kwargs: Any
@@ -782,45 +1370,75 @@ class MarkdownConverter:
         base, ext = os.path.splitext(urlparse(response.url).path)
         self._append_ext(extensions, ext)
 
-        # Save the file locally to a temporary file. It will be deleted before this method exits
-        handle, temp_path = tempfile.mkstemp()
-        fh = os.fdopen(handle, "wb")
+        # Keep the body in memory, spilling to a temporary file only if it grows past
+        # CONVERT_IN_MEMORY_MAX_BYTES. A spilled file is deleted before this method exits
+        source = None
+        temp_path = None
+        fh = None
         result = None
         try:
             # Download the file
-            for chunk in response.iter_content(chunk_size=512):
-                fh.write(chunk)
-            fh.close()
+            # iter_content also replays a body that was already read (e.g. for the page cache)
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if fh is None and len(body) + len(chunk) > CONVERT_IN_MEMORY_MAX_BYTES:
+                    handle, temp_path = tempfile.mkstemp()
+                    fh = os.fdopen(handle, "wb")
+                    fh.write(body)
+                    body = bytearray()
+                if fh is not None:
+                    fh.write(chunk)
+                else:
+                    body += chunk
+            if fh is not None:
+                fh.close()
+                source = _DocumentSource(local_path=temp_path)
+            else:
+                source = _DocumentSource(data=bytes(body))
 
             # Use puremagic to check for more extension options
-            self._append_ext(extensions, self._guess_ext_magic(temp_path))
+            self._append_ext(extensions, self._guess_ext_magic(source))
 
             # Convert
-            result = self._convert(temp_path, extensions, url=response.url)
+            result = self._convert(source, extensions, url=response.url)
         except Exception as e:
             print(f"Error in converting: {e}")
             result = DocumentConverterResult(
                 title=f"Error converting {response.url}",
                 text_content=f"Failed to convert content from {response.url}: {str(e)}"
             )
+            result.error = str(e)
 
         # Clean up
         finally:
-            try:
-                fh.close()
-            except Exception:
-                pass
-            os.unlink(temp_path)
+            if fh is not None:
+                try:
+                    fh.close()
+                except Exception:
+                    pass
+            if source is not None:
+                source.close()
+            if temp_path is not None:
+                os.unlink(temp_path)
 
         return result
 
     def _convert(
-        self, local_path: str, extensions: List[Union[str, None]], **kwargs
+        self,
+        source: Union[str, _DocumentSource],
+        extensions: List[Union[str, None]],
+        **kwargs,
     ) -> DocumentConverterResult:
         error_trace = ""
+        # Every converter shares one read (and parse) of the file
+        if isinstance(source, str):
+            source = _DocumentSource(source)
+        kwargs["document_source"] = source
+        kwargs.setdefault("html_parser", self._html_engine)
+        kwargs.setdefault("main_content", self._main_content)
         for ext in extensions + [None]:  # Try last with no extension
             for converter in self._page_converters:
-                _kwargs = copy.deepcopy(kwargs)
+                _kwargs = dict(kwargs)
 
                 # Overwrite file_extension appropriately
                 if ext is None:
@@ -829,10 +1447,21 @@ class MarkdownConverter:
                 else:
                     _kwargs.update({"file_extension": ext})
 
+                # Skip converters that cannot handle this extension / type / url
+                if not converter.accepts(**_kwargs):
+                    continue
+
                 # If we hit an error log it and keep trying
                 # print(f"trying converter: {converter.__class__.__name__}")
                 try:
-                    res = converter.convert(local_path, **_kwargs)
+                    res = converter.convert(
+                        (
+                            source.local_path
+                            if converter.reads_source
+                            else source.path()
+                        ),
+                        **_kwargs,
+                    )
                 except Exception as e:
                     error_trace = ("\n\n" + traceback.format_exc()).strip()
                     print(f"Error in converter {converter.__class__.__name__}: {str(e)}")
@@ -851,12 +1480,12 @@ class MarkdownConverter:
         # If we got this far without success, report any exceptions
         if len(error_trace) > 0:
             raise FileConversionException(
-                f"Could not convert '{local_path}' to Markdown. File type was recognized as {extensions}. While converting the file, the following error was encountered:\n\n{error_trace}"
+                f"Could not convert '{source.name}' to Markdown. File type was recognized as {extensions}. While converting the file, the following error was encountered:\n\n{error_trace}"
             )
 
         # Nothing can handle it!
         raise UnsupportedFormatException(
-            f"Could not convert '{local_path}' to Markdown. The formats {extensions} are not supported."
+            f"Could not convert '{source.name}' to Markdown. The formats {extensions} are not supported."
         )
 
     def _append_ext(self, extensions, ext):
@@ -870,11 +1499,19 @@ class MarkdownConverter:
         if True:
             extensions.append(ext)
 
-    def _guess_ext_magic(self, path):
+    def _guess_ext_magic(self, source):
         """Use puremagic (a Python implementation of libmagic) to guess a file's extension based on the first few bytes."""
         # Use puremagic to guess
         try:
-            guesses = puremagic.magic_file(path)
+            if isinstance(source, str):
+                guesses = puremagic.magic_file(source)
+            elif source.local_path is not None:
+                guesses = puremagic.magic_file(source.local_path)
+            else:
+                try:
+                    guesses = puremagic.magic_string(source.bytes())
+                except puremagic.PureError:
+                    guesses = []  # no match, as magic_file reports it
             if len(guesses) > 0:
                 ext = guesses[0].extension.strip()
                 if len(ext) > 0:
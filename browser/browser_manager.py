@@ -1,33 +1,172 @@
 from browser.simpletextbrowser import SimpleTextBrowser
 from utils.files import ensure_claude_workspace
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional
+from contextlib import contextmanager
 from dotenv import load_dotenv
 from utils.helpers import WORK_FOLDER
+import threading
+import time
 import os
 
 load_dotenv()
 
+# Live browsers kept in memory, and seconds a browser may sit unused before eviction
+MAX_BROWSERS = int(os.getenv("MAX_BROWSERS", "16"))
+BROWSER_IDLE_TIMEOUT = float(os.getenv("BROWSER_IDLE_TIMEOUT", "1800"))
+# Snapshots of evicted browsers (history, address) kept so they can be restored
+MAX_BROWSER_SNAPSHOTS = int(os.getenv("MAX_BROWSER_SNAPSHOTS", "1024"))
+
 
 class BrowserManager:
-    def __init__(self):
-        self.browsers = {}
+    """
+    One SimpleTextBrowser per Claude, bounded in number.
+
+    Browsers beyond max_browsers (least recently used first) or idle for longer
+    than idle_timeout are dropped with their page content. Their history, address
+    and title are kept as a compact snapshot and restored the next time that Claude
+    browses, without refetching the page. Browsers leased by a running tool are
+    never evicted; the cap may be exceeded until they are returned.
+    """
+
+    def __init__(
+        self,
+        max_browsers: int = MAX_BROWSERS,
+        idle_timeout: Optional[float] = BROWSER_IDLE_TIMEOUT,
+        keep_snapshots: bool = True,
+    ):
+        self.browsers: "OrderedDict[str, SimpleTextBrowser]" = OrderedDict()
+        self.max_browsers = max_browsers
+        self.idle_timeout = idle_timeout
+        self.keep_snapshots = keep_snapshots
+        self._last_used: Dict[str, float] = {}
+        self._leases: Dict[str, int] = {}
+        self._evict_on_return: set = set()
+        self._snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._evictions = 0
+        self._lock = threading.Lock()
 
     def get_browser(self, claude_id):
-        if claude_id not in self.browsers:
-            default_request_kwargs = {
-                "timeout": (10, 10),
-                "headers": {
-                    "User-Agent": (
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/120.0 Safari/537.36"
-                    )
-                },
-            }
-            self.browsers[claude_id] = SimpleTextBrowser(
-                start_page="about:blank",
-                viewport_size=1024 * 8,
-                downloads_folder=ensure_claude_workspace(claude_id),
-                serpapi_key=os.getenv("SERPAPI_KEY"),
-                request_kwargs=default_request_kwargs,
-            )
+        """The Claude's browser, unleased: use lease() when it is used across calls"""
+        with self._lock:
+            return self._get_browser(claude_id)
+
+    @contextmanager
+    def lease(self, claude_id) -> Iterator[SimpleTextBrowser]:
+        """The Claude's browser, kept from eviction until the block exits"""
+        with self._lock:
+            browser = self._get_browser(claude_id)
+            self._leases[claude_id] = self._leases.get(claude_id, 0) + 1
+        try:
+            yield browser
+        finally:
+            with self._lock:
+                self._leases[claude_id] -= 1
+                if not self._leases[claude_id]:
+                    del self._leases[claude_id]
+                    self._last_used[claude_id] = time.time()
+                    if claude_id in self._evict_on_return:
+                        self._evict_on_return.discard(claude_id)
+                        self._evict(claude_id)
+                    else:
+                        self._evict_over_cap()
+
+    def _get_browser(self, claude_id) -> SimpleTextBrowser:
+        self._evict_idle()
+        if claude_id in self.browsers:
+            self.browsers.move_to_end(claude_id)
+        else:
+            self.browsers[claude_id] = self._create_browser(claude_id)
+            snapshot = self._snapshots.pop(claude_id, None)
+            if snapshot is not None:
+                self.browsers[claude_id].restore(snapshot)
+        self._evict_over_cap(keep=claude_id)
+        self._last_used[claude_id] = time.time()
+        self._evict_on_return.discard(claude_id)
         return self.browsers[claude_id]
+
+    def _create_browser(self, claude_id) -> SimpleTextBrowser:
+        default_request_kwargs = {
+            "timeout": (10, 10),
+            "headers": {
+                "User-Agent": (
+                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/120.0 Safari/537.36"
+                )
+            },
+        }
+        return SimpleTextBrowser(
+            start_page="about:blank",
+            viewport_size=1024 * 8,
+            downloads_folder=ensure_claude_workspace(claude_id),
+            serpapi_key=os.getenv("SERPAPI_KEY"),
+            request_kwargs=default_request_kwargs,
+        )
+
+    def _evict(self, claude_id) -> None:
+        browser = self.browsers.pop(claude_id)
+        self._last_used.pop(claude_id, None)
+        self._evictions += 1
+        if self.keep_snapshots:
+            self._snapshots[claude_id] = browser.snapshot()
+            while len(self._snapshots) > MAX_BROWSER_SNAPSHOTS:
+                self._snapshots.popitem(last=False)
+
+    def _evict_over_cap(self, keep=None) -> None:
+        # Least recently used first, skipping leased browsers and the one being handed out
+        for claude_id in list(self.browsers):
+            if len(self.browsers) <= self.max_browsers:
+                break
+            if claude_id not in self._leases and claude_id != keep:
+                self._evict(claude_id)
+
+    def _evict_idle(self) -> int:
+        if not self.idle_timeout:
+            return 0
+        evicted = 0
+        cutoff = time.time() - self.idle_timeout
+        # browsers is in LRU order, so stop at the first recently used one
+        for claude_id in list(self.browsers):
+            if self._last_used.get(claude_id, 0) > cutoff:
+                break
+            if claude_id not in self._leases:
+                self._evict(claude_id)
+                evicted += 1
+        return evicted
+
+    def evict_idle(self) -> int:
+        """Drop browsers unused for idle_timeout seconds, returns how many"""
+        with self._lock:
+            return self._evict_idle()
+
+    def evict(self, claude_id) -> None:
+        """Drop a Claude's browser now (e.g. when it goes to sleep), or once it is returned"""
+        with self._lock:
+            if claude_id in self._leases:
+                self._evict_on_return.add(claude_id)
+            elif claude_id in self.browsers:
+                self._evict(claude_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Memory use and idle time per live browser, plus eviction counters"""
+        with self._lock:
+            self._evict_idle()
+            now = time.time()
+            browsers = {
+                claude_id: {
+                    "memory_bytes": browser.memory_usage(),
+                    "history_length": len(browser.history),
+                    "address": browser.address,
+                    "idle_seconds": round(now - self._last_used[claude_id], 1),
+                    "leased": claude_id in self._leases,
+                }
+                for claude_id, browser in self.browsers.items()
+            }
+            return {
+                "browsers": browsers,
+                "total_memory_bytes": sum(b["memory_bytes"] for b in browsers.values()),
+                "live": len(self.browsers),
+                "snapshots": len(self._snapshots),
+                "evictions": self._evictions,
+            }
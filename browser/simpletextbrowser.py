@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
 from urllib.parse import unquote, urljoin, urlparse
 from browser._md_convert import (
     FileConversionException,
@@ -7,14 +7,32 @@ from browser._md_convert import (
 )
 from serpapi import GoogleSearch
 from browser._cookies import COOKIES
+from browser._http import get_http_session
+from cache.page_cache import CachedPage, PageCache, get_page_cache
+from cache.search_cache import SearchCache, get_search_cache
+from collections import OrderedDict, deque
+from requests.structures import CaseInsensitiveDict
 import pathvalidate
 import requests
+import bisect
 import mimetypes
 import os
 import pathlib
 import re
 import time
 import uuid
+import sys
+
+# Characters a viewport may end on
+_WHITESPACE = re.compile(r"[ \t\r\n]")
+
+# Visits kept in history, and distinct addresses remembered for "previously visited"
+HISTORY_SIZE = int(os.getenv("BROWSER_HISTORY_SIZE", "1000"))
+VISIT_INDEX_SIZE = 10 * HISTORY_SIZE
+
+# Rough per-item sizes for memory_usage (a tuple of two ints, one int)
+_INT_BYTES = sys.getsizeof(2**40)
+_VIEWPORT_BYTES = sys.getsizeof((0, 0)) + 2 * _INT_BYTES
 
 
 class SimpleTextBrowser:
@@ -27,21 +45,44 @@ class SimpleTextBrowser:
         downloads_folder: Optional[Union[str, None]] = None,
         serpapi_key: Optional[Union[str, None]] = None,
         request_kwargs: Optional[Union[Dict[str, Any], None]] = None,
+        session: Optional[requests.Session] = None,
+        page_cache: Optional[PageCache] = None,
+        use_page_cache: bool = True,
+        search_cache: Optional[SearchCache] = None,
     ):
         self.start_page: str = start_page if start_page else "about:blank"
         self.viewport_size = viewport_size
         self.downloads_folder = downloads_folder
-        self.history: List[Tuple[str, float]] = list()
+        self.history: Deque[Tuple[str, float]] = deque(maxlen=HISTORY_SIZE)
+        # Last visit time per address, and the visit before the current one
+        self._last_visits: "OrderedDict[str, float]" = OrderedDict()
+        self._previous_visit: Optional[float] = None
         self.page_title: Optional[str] = None
         self.viewport_current_page = 0
-        self.viewport_pages: List[Tuple[int, int]] = list()
+        self._viewport_pages: List[Tuple[int, int]] = list()
+        # Where lazy splitting resumes, None once the page is fully split
+        self._split_offset: Optional[int] = None
         self.set_address(self.start_page)
         self.serpapi_key = serpapi_key
         self.request_kwargs = request_kwargs
         self.request_kwargs["cookies"] = COOKIES
-        self._mdconvert = MarkdownConverter()
+        self._session = session if session is not None else get_http_session()
+        self._mdconvert = MarkdownConverter(requests_session=self._session)
+        if use_page_cache:
+            self._page_cache = (
+                page_cache if page_cache is not None else get_page_cache()
+            )
+        else:
+            self._page_cache = None
+        self._search_cache = (
+            search_cache if search_cache is not None else get_search_cache()
+        )
         self._page_content: str = ""
         self._find_on_page_query: Union[str, None] = None
+        # Normalized text of every viewport, built on the first search of a page
+        self._search_text: Optional[str] = None
+        self._search_starts: List[int] = []
+        self._search_matches: Dict[str, List[int]] = {}
         self._find_on_page_last_result: Union[int, None] = (
             None  # Location of the last result
         )
@@ -53,7 +94,17 @@ class SimpleTextBrowser:
 
     def set_address(self, uri_or_path: str, filter_year: Optional[int] = None) -> None:
         # TODO: Handle anchors
-        self.history.append((uri_or_path, time.time()))
+        if (
+            self.history
+            and uri_or_path != "about:blank"
+            and not uri_or_path.startswith("google:")
+            and not uri_or_path.startswith("http:")
+            and not uri_or_path.startswith("https:")
+            and not uri_or_path.startswith("file:")
+        ):
+            # Resolve relative paths against the current address before recording
+            uri_or_path = urljoin(self.address, uri_or_path)
+        self._record_visit(uri_or_path)
 
         # Handle special URIs
         if uri_or_path == "about:blank":
@@ -63,26 +114,30 @@ class SimpleTextBrowser:
                 uri_or_path[len("google:") :].strip(), filter_year=filter_year
             )
         else:
-            if (
-                not uri_or_path.startswith("http:")
-                and not uri_or_path.startswith("https:")
-                and not uri_or_path.startswith("file:")
-            ):
-                if len(self.history) > 1:
-                    prior_address = self.history[-2][0]
-                    uri_or_path = urljoin(prior_address, uri_or_path)
-                    # Update the address with the fully-qualified path
-                    self.history[-1] = (uri_or_path, self.history[-1][1])
             self._fetch_page(uri_or_path)
 
         self.viewport_current_page = 0
         self.find_on_page_query = None
         self.find_on_page_viewport = None
 
+    def _record_visit(self, address: str) -> None:
+        now = time.time()
+        self._previous_visit = self._last_visits.get(address)
+        self.history.append((address, now))
+        self._last_visits[address] = now
+        self._last_visits.move_to_end(address)
+        if len(self._last_visits) > VISIT_INDEX_SIZE:
+            self._last_visits.popitem(last=False)
+
+    def _prev_visit_note(self, visited_at: Optional[float]) -> str:
+        if visited_at is None:
+            return ""
+        return f"You previously visited this page {round(time.time() - visited_at)} seconds ago.\n"
+
     @property
     def viewport(self) -> str:
         """Return the content of the current viewport."""
-        bounds = self.viewport_pages[self.viewport_current_page]
+        bounds = self._viewport_bounds(self.viewport_current_page)
         return self.page_content[bounds[0] : bounds[1]]
 
     @property
@@ -94,13 +149,15 @@ class SimpleTextBrowser:
         """Sets the text content of the current page."""
         self._page_content = content
         self._split_pages()
-        if self.viewport_current_page >= len(self.viewport_pages):
+        self._search_text = None
+        self._search_starts = []
+        self._search_matches = {}
+        if self._viewport_bounds(self.viewport_current_page) is None:
             self.viewport_current_page = len(self.viewport_pages) - 1
 
     def page_down(self) -> None:
-        self.viewport_current_page = min(
-            self.viewport_current_page + 1, len(self.viewport_pages) - 1
-        )
+        if self._viewport_bounds(self.viewport_current_page + 1) is not None:
+            self.viewport_current_page += 1
 
     def page_up(self) -> None:
         self.viewport_current_page = max(self.viewport_current_page - 1, 0)
@@ -138,7 +195,7 @@ class SimpleTextBrowser:
             starting_viewport = 0
         else:
             starting_viewport += 1
-            if starting_viewport >= len(self.viewport_pages):
+            if self._viewport_bounds(starting_viewport) is None:
                 starting_viewport = 0
 
         viewport_match = self._find_next_viewport(
@@ -171,20 +228,43 @@ class SimpleTextBrowser:
         if nquery.strip() == "":
             return None
 
-        idxs = list()
-        idxs.extend(range(starting_viewport, len(self.viewport_pages)))
-        idxs.extend(range(0, starting_viewport))
-
-        for i in idxs:
-            bounds = self.viewport_pages[i]
-            content = self.page_content[bounds[0] : bounds[1]]
-
-            # TODO: Remove markdown links and images
-            ncontent = " " + (" ".join(re.split(r"\W+", content))).strip().lower() + " "
-            if re.search(nquery, ncontent):
-                return i
-
-        return None
+        matches = self._find_matching_viewports(nquery)
+        if not matches:
+            return None
+        i = bisect.bisect_left(matches, starting_viewport)
+        return matches[i] if i < len(matches) else matches[0]
+
+    def _find_matching_viewports(self, nquery: str) -> List[int]:
+        """Sorted viewports containing the normalized query, one regex pass per page and query"""
+        matches = self._search_matches.get(nquery)
+        if matches is not None:
+            return matches
+
+        if self._search_text is None:
+            # Normalized viewports joined by newlines, which a query can never match,
+            # so a match never spans two viewports
+            segments = []
+            offset = 0
+            for bounds in self.viewport_pages:
+                content = self.page_content[bounds[0] : bounds[1]]
+
+                # TODO: Remove markdown links and images
+                ncontent = (
+                    " " + (" ".join(re.split(r"\W+", content))).strip().lower() + " "
+                )
+                segments.append(ncontent)
+                self._search_starts.append(offset)
+                offset += len(ncontent) + 1
+            self._search_text = "\n".join(segments)
+
+        matches = list(
+            dict.fromkeys(
+                bisect.bisect_right(self._search_starts, m.start()) - 1
+                for m in re.finditer(nquery, self._search_text)
+            )
+        )
+        self._search_matches[nquery] = matches
+        return matches
 
     def visit_page(self, path_or_uri: str, filter_year: Optional[int] = None) -> str:
         """Update the address, visit the page, and return the content of the viewport."""
@@ -192,28 +272,43 @@ class SimpleTextBrowser:
         return self.viewport
 
     def _split_pages(self) -> None:
+        """Reset the viewport boundaries; pages are split lazily as they are viewed"""
+        self._split_offset = None
+
         # Do not split search results
         if self.address.startswith("google:"):
-            self.viewport_pages = [(0, len(self._page_content))]
+            self._viewport_pages = [(0, len(self._page_content))]
             return
 
         # Handle empty pages
         if len(self._page_content) == 0:
-            self.viewport_pages = [(0, 0)]
+            self._viewport_pages = [(0, 0)]
             return
 
-        # Break the viewport into pages
-        self.viewport_pages = []
-        start_idx = 0
-        while start_idx < len(self._page_content):
-            end_idx = min(start_idx + self.viewport_size, len(self._page_content))  # type: ignore[operator]
+        self._viewport_pages = []
+        self._split_offset = 0
+
+    def _viewport_bounds(self, i: int) -> Optional[Tuple[int, int]]:
+        """(start, end) of viewport i, splitting the page only as far as needed"""
+        content = self._page_content
+        while len(self._viewport_pages) <= i and self._split_offset is not None:
+            start_idx = self._split_offset
+            end_idx = min(start_idx + self.viewport_size, len(content))  # type: ignore[operator]
             # Adjust to end on a space
-            while end_idx < len(self._page_content) and self._page_content[
-                end_idx - 1
-            ] not in [" ", "\t", "\r", "\n"]:
-                end_idx += 1
-            self.viewport_pages.append((start_idx, end_idx))
-            start_idx = end_idx
+            if end_idx < len(content):
+                match = _WHITESPACE.search(content, end_idx - 1)
+                end_idx = match.end() if match else len(content)
+            self._viewport_pages.append((start_idx, end_idx))
+            self._split_offset = end_idx if end_idx < len(content) else None
+        if 0 <= i < len(self._viewport_pages):
+            return self._viewport_pages[i]
+        return None
+
+    @property
+    def viewport_pages(self) -> List[Tuple[int, int]]:
+        """Boundaries of every viewport (splits the whole page)"""
+        self._viewport_bounds(len(self._page_content))
+        return self._viewport_pages
 
     def _serpapi_search(self, query: str, filter_year: Optional[int] = None) -> None:
         if self.serpapi_key is None:
@@ -229,8 +324,12 @@ class SimpleTextBrowser:
                 f"cdr:1,cd_min:01/01/{filter_year},cd_max:12/31/{filter_year}"
             )
 
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        # Identical searches (from any agent) are answered from the shared cache
+        results = self._search_cache.get(query, filter_year)
+        if results is None:
+            search = GoogleSearch(params)
+            results = search.get_dict()
+            self._search_cache.store(query, filter_year, results)
         self.page_title = f"{query} - Search"
         if "organic_results" not in results.keys():
             raise Exception(
@@ -246,10 +345,7 @@ class SimpleTextBrowser:
             return
 
         def _prev_visit(url):
-            for i in range(len(self.history) - 1, -1, -1):
-                if self.history[i][0] == url:
-                    return f"You previously visited this page {round(time.time() - self.history[i][1])} seconds ago.\n"
-            return ""
+            return self._prev_visit_note(self._last_visits.get(url))
 
         web_snippets: List[str] = list()
         idx = 0
@@ -284,6 +380,7 @@ class SimpleTextBrowser:
 
     def _fetch_page(self, url: str) -> None:
         download_path = ""
+        response = None
         try:
             if url.startswith("file://"):
                 download_path = os.path.normcase(os.path.normpath(unquote(url[7:])))
@@ -299,8 +396,39 @@ class SimpleTextBrowser:
                 )
                 request_kwargs["stream"] = True
 
-                # Send a HTTP request to the URL
-                response = requests.get(url, **request_kwargs)
+                # Serve fresh pages from the shared cache, revalidate stale ones
+                # (entries are matched on the headers named by their Vary)
+                request_headers = CaseInsensitiveDict(
+                    {**self._session.headers, **(request_kwargs.get("headers") or {})}
+                )
+                cached = (
+                    self._page_cache.get(url, request_headers)
+                    if self._page_cache is not None
+                    else None
+                )
+                if cached is not None and cached.fresh and self._show_cached(cached):
+                    self._page_cache.record_hit()
+                    return
+                if cached is not None:
+                    request_kwargs["headers"] = {
+                        **(request_kwargs.get("headers") or {}),
+                        **cached.validators(),
+                    }
+
+                # Send a HTTP request to the URL (pooled keep-alive connection)
+                response = self._session.get(url, **request_kwargs)
+                if response.status_code == 304 and cached is not None:
+                    self._page_cache.refresh(url, response.headers)
+                    if self._show_cached(cached):
+                        self._page_cache.record_hit(revalidated=True)
+                        return
+                    # The cached files are gone, fetch the page unconditionally
+                    response.close()
+                    for header in cached.validators():
+                        request_kwargs["headers"].pop(header)
+                    response = self._session.get(url, **request_kwargs)
+                if self._page_cache is not None:
+                    self._page_cache.record_miss()
                 response.raise_for_status()
 
                 # If the HTTP request was successful
@@ -308,9 +436,25 @@ class SimpleTextBrowser:
 
                 # Text or HTML
                 if "text/" in content_type.lower():
+                    # Buffer the body first so it can be cached as well as converted
+                    body = response.content if self._page_cache is not None else None
                     res = self._mdconvert.convert_response(response)
                     self.page_title = res.title
                     self._set_page_content(res.text_content)
+                    if (
+                        body is not None
+                        and response.status_code == 200
+                        and res.error is None
+                    ):
+                        self._page_cache.store(
+                            url,
+                            response.headers,
+                            body,
+                            res.title,
+                            res.text_content,
+                            self._mdconvert.version,
+                            request_headers=request_headers,
+                        )
                 # A download
                 else:
                     # Try producing a safe filename
@@ -348,7 +492,7 @@ class SimpleTextBrowser:
 
                     # Open a file for writing
                     with open(download_path, "wb") as fh:
-                        for chunk in response.iter_content(chunk_size=512):
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
                             fh.write(chunk)
 
                     # Render it first (while local file exists)
@@ -421,9 +565,75 @@ class SimpleTextBrowser:
                         text += chunk
                     self.page_title = f"Error {response.status_code}"
                     self._set_page_content(f"## Error {response.status_code}\n\n{text}")
-            except NameError:
+            except (NameError, AttributeError):
                 self.page_title = "Error"
                 self._set_page_content(f"## Error\n\n{str(request_exception)}")
+        finally:
+            # Hand the connection back to the shared pool
+            if response is not None:
+                response.close()
+
+    def _show_cached(self, cached: CachedPage) -> bool:
+        """Show a cached page, re-converting its raw body if the converter changed"""
+        if cached.converter_version == self._mdconvert.version:
+            markdown = cached.markdown
+            if markdown is None:
+                return False
+            self.page_title = cached.title
+            self._set_page_content(markdown)
+            return True
+
+        response = cached.response()
+        if response is None:
+            return False
+        res = self._mdconvert.convert_response(response)
+        if res.error is not None:
+            return False
+        self._page_cache.update_markdown(
+            cached.url, res.title, res.text_content, self._mdconvert.version
+        )
+        self.page_title = res.title
+        self._set_page_content(res.text_content)
+        return True
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the current page, its indexes and the history"""
+        size = sys.getsizeof(self._page_content)
+        size += len(self._viewport_pages) * _VIEWPORT_BYTES
+        if self._search_text is not None:
+            size += sys.getsizeof(self._search_text)
+            size += len(self._search_starts) * _INT_BYTES
+        size += sum(sys.getsizeof(address) for address, _ in self.history)
+        size += len(self.history) * _VIEWPORT_BYTES
+        return size
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Compact state to restore this browser later without its page content"""
+        return {
+            "history": list(self.history),
+            "page_title": self.page_title,
+            "viewport_current_page": self.viewport_current_page,
+        }
+
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        """Restore a snapshot; the page itself is not refetched until visited again"""
+        self.history = deque(snapshot["history"], maxlen=HISTORY_SIZE)
+        self._last_visits = OrderedDict()
+        for address, visited_at in list(self.history)[:-1]:
+            self._last_visits[address] = visited_at
+            self._last_visits.move_to_end(address)
+        self._previous_visit = self._last_visits.get(self.address)
+        self._last_visits[self.address] = self.history[-1][1]
+        self._last_visits.move_to_end(self.address)
+        self.page_title = snapshot["page_title"]
+        if self.address == "about:blank":
+            self._set_page_content("")
+            return
+        self._set_page_content(
+            f"This page was unloaded to save memory while you were away "
+            f"(you were on page {snapshot['viewport_current_page'] + 1}). "
+            f"Visit {self.address} again to reload it."
+        )
 
     def _state(self) -> Tuple[str, str]:
         header = f"Address: {self.address}\n"
@@ -431,13 +641,14 @@ class SimpleTextBrowser:
             header += f"Title: {self.page_title}\n"
 
         current_page = self.viewport_current_page
-        total_pages = len(self.viewport_pages)
+        if self._split_offset is None:
+            total_pages = str(len(self._viewport_pages))
+        else:
+            # Not split to the end yet, estimate from the remaining characters
+            remaining = len(self._page_content) - self._split_offset
+            total_pages = f"about {len(self._viewport_pages) + -(-remaining // self.viewport_size)}"
 
-        address = self.address
-        for i in range(len(self.history) - 2, -1, -1):  # Start from the second last
-            if self.history[i][0] == address:
-                header += f"You previously visited this page {round(time.time() - self.history[i][1])} seconds ago.\n"
-                break
+        header += self._prev_visit_note(self._previous_visit)
 
         header += (
             f"Viewport position: Showing page {current_page + 1} of {total_pages}.\n"
@@ -0,0 +1,380 @@
+from requests.structures import CaseInsensitiveDict
+from utils.helpers import WEB_CACHE_DIR
+from typing import Dict, Optional
+import threading
+import requests
+import tempfile
+import sqlite3
+import hashlib
+import time
+import os
+import io
+import re
+
+# Fresh lifetime when the server gives no max-age, and the total on-disk budget
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "3600"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Response headers kept so a cached body can be replayed through convert_response
+_REPLAY_HEADERS = ("content-type", "content-disposition")
+
+
+def _vary_key(vary: str, request_headers) -> Optional[str]:
+    """The request header values a response varies on, None for Vary: *"""
+    names = sorted({name.strip().lower() for name in vary.split(",") if name.strip()})
+    if "*" in names:
+        return None
+    return "\n".join(f"{name}: {request_headers.get(name, '')}" for name in names)
+
+
+class CachedPage:
+    """One cached URL: raw body + converted markdown, with its validators"""
+
+    def __init__(self, cache: "PageCache", row: sqlite3.Row):
+        self._cache = cache
+        self.url: str = row["url"]
+        self.converter_version: str = str(row["converter_version"])
+        self.body_sha: str = row["body_sha"]
+        self.markdown_sha: str = row["markdown_sha"]
+        self.title: Optional[str] = row["title"]
+        self.headers: Dict[str, str] = {
+            h: row[h.replace("-", "_")]
+            for h in _REPLAY_HEADERS
+            if row[h.replace("-", "_")]
+        }
+        self.etag: Optional[str] = row["etag"]
+        self.last_modified: Optional[str] = row["last_modified"]
+        self.expires_at: float = row["expires_at"]
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidation"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    @property
+    def markdown(self) -> Optional[str]:
+        data = self._cache._read_blob(self.markdown_sha)
+        return data.decode("utf-8") if data is not None else None
+
+    def response(self) -> Optional[requests.Response]:
+        """Rebuild a Response from the raw body, e.g. to re-convert with a newer converter"""
+        body = self._cache._read_blob(self.body_sha)
+        if body is None:
+            return None
+        response = requests.Response()
+        response.raw = io.BytesIO(body)
+        response.status_code = 200
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        return response
+
+
+class PageCache:
+    """
+    Persistent page cache shared by every browser in the process (and across restarts).
+
+    Raw bodies and converted markdown are stored as content-addressed blobs under
+    WEB_CACHE_DIR, indexed by URL in sqlite. An entry is served directly while fresh,
+    revalidated with ETag / Last-Modified once stale, and re-converted from the raw
+    body when the converter version changes. Least recently used entries are evicted
+    once the blobs exceed max_bytes.
+
+    The cache is shared by every Claude, so responses marked private (or no-store)
+    are never stored. One variant is kept per URL, served only to requests whose
+    headers match the ones named by its Vary.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = WEB_CACHE_DIR,
+        ttl: int = PAGE_CACHE_TTL,
+        max_bytes: int = PAGE_CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, "pages.sqlite"),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                converter_version TEXT NOT NULL,
+                body_sha TEXT NOT NULL,
+                markdown_sha TEXT NOT NULL,
+                title TEXT,
+                content_type TEXT,
+                content_disposition TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                vary TEXT,
+                vary_key TEXT
+            )""")
+        # Caches created before Vary was honoured
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(pages)")}
+        for column in ("vary", "vary_key"):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)"
+        )
+
+    # ========================= Blobs =========================
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.blob_dir, sha[:2], sha)
+
+    def _write_blob(self, data: bytes) -> str:
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(handle, "wb") as fh:
+                fh.write(data)
+            os.replace(temp_path, path)
+        return sha
+
+    def _read_blob(self, sha: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(sha), "rb") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return None
+
+    def _drop_orphans(self, shas) -> None:
+        """Delete blobs no longer referenced by any entry"""
+        for sha in set(shas):
+            row = self._db.execute(
+                "SELECT 1 FROM pages WHERE body_sha = ? OR markdown_sha = ? LIMIT 1",
+                (sha, sha),
+            ).fetchone()
+            if row is None:
+                try:
+                    os.remove(self._blob_path(sha))
+                except FileNotFoundError:
+                    pass
+
+    # ========================= Entries =========================
+
+    def get(self, url: str, request_headers=None) -> Optional[CachedPage]:
+        """Cached entry for a URL (fresh or stale) matching the request's headers, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row["vary"] and row["vary_key"] != _vary_key(
+                row["vary"], request_headers or {}
+            ):
+                return None
+            self._db.execute(
+                "UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url)
+            )
+            return CachedPage(self, row)
+
+    def record_hit(self, revalidated: bool = False) -> None:
+        with self._lock:
+            self._stats["revalidated" if revalidated else "hits"] += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self._stats["misses"] += 1
+
+    def _lifetime(self, headers) -> Optional[int]:
+        """Seconds the response may be served without revalidation, None if not storable"""
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-store" in cache_control or "private" in cache_control:
+            return None
+        if "no-cache" in cache_control:
+            return 0
+        m = re.search(r"max-age=(\d+)", cache_control)
+        if m:
+            return int(m.group(1))
+        return self.ttl
+
+    def store(
+        self,
+        url: str,
+        headers,
+        body: bytes,
+        title: Optional[str],
+        markdown: str,
+        converter_version: str,
+        request_headers=None,
+    ) -> None:
+        """Store a 200 response body and its converted markdown"""
+        lifetime = self._lifetime(headers)
+        vary = headers.get("vary", "")
+        vary_key = _vary_key(vary, request_headers or {})
+        markdown_bytes = markdown.encode("utf-8")
+        size = len(body) + len(markdown_bytes)
+        if lifetime is None or vary_key is None or size > self.max_bytes // 10:
+            return
+
+        now = time.time()
+        with self._lock:
+            old = self._db.execute(
+                "SELECT body_sha, markdown_sha FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            body_sha = self._write_blob(body)
+            markdown_sha = self._write_blob(markdown_bytes)
+            self._db.execute(
+                """INSERT OR REPLACE INTO pages (url, converter_version, body_sha,
+                   markdown_sha, title, content_type, content_disposition, etag,
+                   last_modified, size, stored_at, expires_at, last_access, vary,
+                   vary_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    url,
+                    converter_version,
+                    body_sha,
+                    markdown_sha,
+                    title,
+                    headers.get("content-type"),
+                    headers.get("content-disposition"),
+                    headers.get("etag"),
+                    headers.get("last-modified"),
+                    size,
+                    now,
+                    now + lifetime,
+                    now,
+                    vary or None,
+                    vary_key,
+                ),
+            )
+            if old is not None:
+                self._drop_orphans(old)
+            self._stats["stores"] += 1
+            self._evict()
+
+    def update_markdown(
+        self, url: str, title: Optional[str], markdown: str, converter_version: str
+    ) -> None:
+        """Replace the markdown of an entry re-converted from its raw body"""
+        markdown_bytes = markdown.encode("utf-8")
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body_sha, markdown_sha FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return
+            body_size = os.path.getsize(self._blob_path(row["body_sha"]))
+            self._db.execute(
+                """UPDATE pages SET markdown_sha = ?, title = ?, converter_version = ?,
+                   size = ? WHERE url = ?""",
+                (
+                    self._write_blob(markdown_bytes),
+                    title,
+                    converter_version,
+                    body_size + len(markdown_bytes),
+                    url,
+                ),
+            )
+            self._drop_orphans([row["markdown_sha"]])
+
+    def refresh(self, url: str, headers) -> None:
+        """Extend an entry's lifetime after a 304 Not Modified"""
+        lifetime = self._lifetime(headers)
+        with self._lock:
+            if lifetime is None:
+                self._delete(url)
+                return
+            self._db.execute(
+                """UPDATE pages SET expires_at = ?,
+                   etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                   WHERE url = ?""",
+                (
+                    time.time() + lifetime,
+                    headers.get("etag"),
+                    headers.get("last-modified"),
+                    url,
+                ),
+            )
+
+    def _delete(self, url: str) -> None:
+        row = self._db.execute(
+            "SELECT body_sha, markdown_sha FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._drop_orphans(row)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[
+            0
+        ]
+        if total <= self.max_bytes:
+            return
+        for row in self._db.execute(
+            "SELECT url, size FROM pages ORDER BY last_access"
+        ).fetchall():
+            self._delete(row["url"])
+            self._stats["evictions"] += 1
+            total -= row["size"]
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this process plus the current size of the cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+        stats["hit_rate"] = (
+            (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+        )
+        stats["entries"] = entries
+        stats["bytes"] = size
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT body_sha, markdown_sha FROM pages"
+            ).fetchall()
+            self._db.execute("DELETE FROM pages")
+            self._drop_orphans(sha for row in rows for sha in row)
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Process-wide page cache"""
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+    return _page_cache
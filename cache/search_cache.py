@@ -0,0 +1,101 @@
+from utils.helpers import WEB_CACHE_DIR
+from typing import Any, Dict, Optional
+import threading
+import sqlite3
+import json
+import time
+import os
+import re
+
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(6 * 3600)))
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query"""
+    return re.sub(r"\s+", " ", query).strip().casefold()
+
+
+class SearchCache:
+    """
+    SerpAPI results shared by every browser in the process, persisted in sqlite.
+
+    Keyed by normalized query and filter_year. Only successful result sets are
+    stored, so errors and quota failures are retried on the next search.
+    """
+
+    def __init__(self, cache_dir: str = WEB_CACHE_DIR, ttl: int = SEARCH_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, "search.sqlite"),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS searches (
+                key TEXT PRIMARY KEY,
+                results TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )""")
+
+    def _key(self, query: str, filter_year: Optional[int]) -> str:
+        return (
+            f"{normalize_query(query)}|{filter_year if filter_year is not None else ''}"
+        )
+
+    def get(
+        self, query: str, filter_year: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Cached SerpAPI response for the query, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT results FROM searches WHERE key = ? AND expires_at > ?",
+                (self._key(query, filter_year), time.time()),
+            ).fetchone()
+            self._stats["hits" if row else "misses"] += 1
+        return json.loads(row[0]) if row else None
+
+    def store(
+        self, query: str, filter_year: Optional[int], results: Dict[str, Any]
+    ) -> None:
+        if "organic_results" not in results or "error" in results:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?)",
+                (self._key(query, filter_year), json.dumps(results), now + self.ttl),
+            )
+            self._db.execute("DELETE FROM searches WHERE expires_at <= ?", (now,))
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this process plus the number of cached queries"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._db.execute(
+                "SELECT COUNT(*) FROM searches WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM searches")
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide search cache"""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+    return _search_cache
@@ -251,3 +251,36 @@ class RedisStateManager:
             self._delete(key)
         except Exception as e:
             print(f"State error in delete_kernel_pid: {e}")
+
+    # ========================= Kernel Metrics =========================
+
+    def record_kernel_metrics(self, claude_id: str, metrics: Dict[str, Any]):
+        """Add one execution's metrics to the Claude's running totals (kept for a day)"""
+        try:
+            key = self._make_key("kernel_metrics", claude_id)
+            with self._lock:
+                totals = json.loads(self._get(key) or "{}")
+                totals["executions"] = totals.get("executions", 0) + 1
+                totals["interrupted"] = totals.get("interrupted", 0) + int(
+                    bool(metrics.get("interrupted"))
+                )
+                for name in ("wall_seconds", "cpu_seconds", "output_bytes"):
+                    totals[name] = round(
+                        totals.get(name, 0) + (metrics.get(name) or 0), 3
+                    )
+                totals["max_peak_rss_bytes"] = max(
+                    totals.get("max_peak_rss_bytes", 0),
+                    metrics.get("peak_rss_bytes") or 0,
+                )
+                self._set_with_ttl(key, json.dumps(totals), 86400)
+        except Exception as e:
+            print(f"State error in record_kernel_metrics: {e}")
+
+    def get_kernel_metrics(self, claude_id: str) -> Dict[str, Any]:
+        """Totals of the Claude's kernel executions over the last day of activity"""
+        try:
+            key = self._make_key("kernel_metrics", claude_id)
+            return json.loads(self._get(key) or "{}")
+        except Exception as e:
+            print(f"State error in get_kernel_metrics: {e}")
+            return {}
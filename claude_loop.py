@@ -1,6 +1,6 @@
 import imp
 from entry.entries import MemoryManager
-from utils.tokenization import token_cutter
+from utils.tokenization import TokenCountCache, token_cutter
 from execute_tool import (
     TOOLS_TO_SAVE,
     JOURNAL_TOOLS,
@@ -8,12 +8,11 @@ from execute_tool import (
     execute_tool_call,
 )
 from utils.helpers import tokenizer
-from models.schema import function_to_schema
+from utils.streaming import DeltaCoalescer
 from cache.state import RedisStateManager
 from models.anthropic import model_call
 from agent.agent import Agent
 from dotenv import load_dotenv
-from functools import partial
 from typing import Optional
 import asyncio
 import json
@@ -30,12 +29,15 @@ async def run_claude_loop(
     claude_id: str,
     stream_id,
     max_loops: Optional[int] = 50,
+    stream_mode: str = "coalesce",
+    stream_interval: float = 0.05,
 ):
     """
     Infinite autonomous loop
     - Checks Redis for stimuli each iteration
     - Permanently stores thoughts/actions in SQLite
     - Summarizes periodically via Haiku
+    - Streams text/thinking per stream_mode (see utils.streaming)
     """
 
     memory_manager = MemoryManager()  # Fix: no claude_id parameter
@@ -46,6 +48,7 @@ async def run_claude_loop(
     compl_response = ""
     finish_reason = ""
     loop_msgs = []
+    token_cache = TokenCountCache()
     max_tokens = 60000
     loop_counter = 0
     active_tool_calls = {}
@@ -53,6 +56,7 @@ async def run_claude_loop(
     complete_thinking = ""
     thinking_signature = ""
     sources = []
+    coalescer = DeltaCoalescer(stream_mode, stream_interval)
 
     #######msgs
     loop_msgs = await memory_manager.get_messages_anth_format(
@@ -79,35 +83,23 @@ async def run_claude_loop(
                 }
             )
 
-        ############tools
-        tool_schemas = []
-        for tool in current_agent.tools:
-            tool_schemas.append(function_to_schema(tool))
-        tools = {}
-        for tool in current_agent.tools:
-            if isinstance(tool, partial):
-                tools[tool.func.__name__] = tool
-            else:
-                tools[tool.__name__] = tool
+        ############tools (schemas cached on the agent)
+        tool_schemas = current_agent.tool_schemas
+        tools = current_agent.tool_map
 
         #########build sys msg
         system_messages = [
             {"role": "system", "content": current_agent.get_instructions()}
         ]
 
-        # Add journal if exists
-        plan_msg = []  # Fix: initialize plan_msg to avoid undefined error
+        # Add journal if exists, after the cached history (it changes between turns)
+        journal_reminder = None
         journal_data = redis_state.get_journal(claude_id)
         if journal_data:
             journal = json.loads(journal_data)
             recent_content = journal.get("notes", "")
             recent_feelings = journal.get("feelings", "")
-            plan_msg = [
-                {
-                    "role": "system",
-                    "content": f"<memory-reminder>Here is your most recent journal:\n\n{recent_content}\n\nFeelings: {recent_feelings}\n\n</memory-reminder>",
-                }
-            ]
+            journal_reminder = f"<memory-reminder>Here is your most recent journal:\n\n{recent_content}\n\nFeelings: {recent_feelings}\n\n</memory-reminder>"
 
         # Add daylight stimuli
         pending_stimuli = redis_state.get_pending_stimuli(claude_id)
@@ -126,8 +118,8 @@ async def run_claude_loop(
                 loop_msgs.append({"role": "user", "content": content})
 
         tool_choice = None
-        trimmed_loop_msgs = token_cutter(loop_msgs, tokenizer, max_tokens)
-        trimmed_messages = system_messages + plan_msg + trimmed_loop_msgs
+        trimmed_loop_msgs = token_cutter(loop_msgs, tokenizer, max_tokens, token_cache)
+        trimmed_messages = system_messages + trimmed_loop_msgs
 
         # print(f"{'=' * 10}")
         # print(f"a new loop")
@@ -135,6 +127,7 @@ async def run_claude_loop(
 
         yield f"z:{loop_counter}\n"
 
+        stream = None
         try:
             stream = await model_call(
                 model=current_agent.model,
@@ -143,6 +136,8 @@ async def run_claude_loop(
                 tool_choice=tool_choice,
                 thinking=True,
                 stream=True,
+                cache_breakpoints=["tools", "system", "history"],
+                turn_context=journal_reminder,
             )
 
             yield f'f:{{"messageId":"step-{uuid.uuid4().hex[:8]}"}}\n'
@@ -150,6 +145,14 @@ async def run_claude_loop(
                 yield f'0:{json.dumps(f"Claude is having issues.. wait and try later.")}\n'
                 return
             async for event in stream:
+                # Buffered deltas must go out before any other frame
+                if not (
+                    event.type == "content_block_delta"
+                    and event.delta.type in ("text_delta", "thinking_delta")
+                ):
+                    for frame in coalescer.flush():
+                        yield frame
+
                 if not redis_state.get_streaming_state(claude_id, stream_id):
                     yield f'd:{{"finishReason":"stop","usage":{{"promptTokens":0,"completionTokens":0}}}}\n'
 
@@ -173,23 +176,41 @@ async def run_claude_loop(
                 if event.type == "ping":
                     yield "\n"
 
+                elif event.type == "message_start":
+                    usage = getattr(event.message, "usage", None)
+                    if usage is not None:
+                        cache_usage = {
+                            "type": "cache_usage",
+                            "inputTokens": usage.input_tokens or 0,
+                            "cacheReadInputTokens": getattr(
+                                usage, "cache_read_input_tokens", 0
+                            )
+                            or 0,
+                            "cacheCreationInputTokens": getattr(
+                                usage, "cache_creation_input_tokens", 0
+                            )
+                            or 0,
+                        }
+                        yield f"2:{json.dumps([cache_usage])}\n"
+
                 elif (
                     event.type == "content_block_delta"
                     and event.delta.type == "text_delta"
                 ):
                     response_text = event.delta.text or ""
                     compl_response += response_text
-                    for char in response_text:
-                        yield f"0:{json.dumps(char)}\n"
-                        await asyncio.sleep(0.01)
+                    for frame in coalescer.add("0", response_text):
+                        yield frame
+                        if coalescer.mode == "char":
+                            await asyncio.sleep(0.01)
                 elif (
                     event.type == "content_block_delta"
                     and event.delta.type == "thinking_delta"
                 ):
                     thinking_text = event.delta.thinking or ""
                     complete_thinking += thinking_text
-                    for char in thinking_text:
-                        yield f"g:{json.dumps(char)}\n"
+                    for frame in coalescer.add("g", thinking_text):
+                        yield frame
 
                 elif (
                     event.type == "content_block_delta"
@@ -320,6 +341,7 @@ async def run_claude_loop(
                             tools,
                             claude_id,
                             stream_id,
+                            current_agent.tool_schema_map,
                         ):
                             if item.get("type") == "tool_progress":
                                 progress = item.get("progress", "")
@@ -447,10 +469,16 @@ async def run_claude_loop(
                         break
 
         except Exception as e:
+            for frame in coalescer.flush():
+                yield frame
             yield f'0:{json.dumps(f"⚠️ AI model is experiencing technical difficulties, please try resubmitting your request. Error: {e}")}\n'
             yield f'd:{{"finishReason":"stop","usage":{{"promptTokens":0,"completionTokens":0}}}}\n'
             sources = []
             redis_state.set_streaming_state(claude_id, stream_id, True)
+        finally:
+            # Gives back the model_calls slot when the stream was left early
+            if stream:
+                await stream.close()
     yield f'd:{{"finishReason":"stop","usage":{{"promptTokens":0,"completionTokens":0}}}}\n'
     sources = []
     redis_state.set_streaming_state(claude_id, stream_id, True)
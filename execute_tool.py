@@ -1,5 +1,6 @@
 from models.schema import function_to_schema
-from typing import Any, Dict
+from utils.concurrency import run_sync_tool
+from typing import Any, Dict, Optional
 import inspect
 import json
 import re
@@ -15,31 +16,38 @@ JOURNAL_TOOLS = [
 TOOLS_TO_SAVE = ["kernel"]
 
 
+async def _call_tool(name: str, tool: callable, args: Dict, claude_id: str) -> Any:
+    """Await async tools; run blocking ones on the tool thread pool"""
+    if inspect.iscoroutinefunction(tool):
+        return await tool(**args, claude_id=claude_id)
+    return await run_sync_tool(name, tool, **args, claude_id=claude_id)
+
+
 async def execute_tool_call(
     tool_call: Dict,
     tools: Dict[str, callable],
     claude_id: str,
     stream_id: str,
+    tool_schemas: Optional[Dict[str, Dict]] = None,
 ) -> Any:
-    """Execute a tool call by extracting required params"""
+    """Execute a tool call by extracting required params
+
+    tool_schemas: name -> schema map (Agent.tool_schema_map) so schemas are not re-parsed per call
+    """
     default_token_limit = 30000
     name = tool_call["name"]
     try:
-        if (
-            name
-            in [
-                "vision",
-            ]
-            and stream_id
-        ):
+        # Async generator tools (vision, kernel) stream tool_progress before their result
+        if inspect.isasyncgenfunction(tools[name]):
             if tool_call["arguments"].strip() == "":
                 args = {}
             else:
                 args = json.loads(tool_call["arguments"])
             tool = tools[name]
             final_result = None
-            if inspect.isasyncgenfunction(tool):
-                async for update in tool(**args, claude_id=claude_id):
+            updates = tool(**args, claude_id=claude_id, stream_id=stream_id)
+            try:
+                async for update in updates:
                     if update.get("type") == "tool_result":
                         final_result = (
                             update["result"],
@@ -54,8 +62,14 @@ async def execute_tool_call(
                         return
                     elif update.get("type") == "tool_progress":
                         yield update
-                return
-        tool_schema = function_to_schema(tools[name])
+            finally:
+                # Run the tool's cleanup now when it stopped early (endOfMessage)
+                await updates.aclose()
+            return
+        if tool_schemas and name in tool_schemas:
+            tool_schema = tool_schemas[name]
+        else:
+            tool_schema = function_to_schema(tools[name])
         tool = tools[name]
         schema_params = tool_schema["input_schema"]["properties"]
         if name == "visit_url":
@@ -67,10 +81,7 @@ async def execute_tool_call(
             for match in json_matches:
                 try:
                     args = json.loads(match.group())
-                    if inspect.iscoroutinefunction(tool):
-                        result = await tool(**args, claude_id=claude_id)
-                    else:
-                        result = tool(**args, claude_id=claude_id)
+                    result = await _call_tool(name, tool, args, claude_id)
                     combined_results.append(result[0])
                     if result[1]:
                         combined_content.append(result[1])
@@ -106,10 +117,7 @@ async def execute_tool_call(
                 ),
             }
             return
-        if inspect.iscoroutinefunction(tool):
-            result = await tool(**args, claude_id=claude_id)
-        else:
-            result = tool(**args, claude_id=claude_id)
+        result = await _call_tool(name, tool, args, claude_id)
         yield {"type": "tool_result", "value": result}
         return
     except Exception as e:
@@ -1,12 +1,151 @@
 from typing import List, Dict, Any, Optional, Union
-from anthropic import AsyncAnthropic
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+from utils.concurrency import acquire_slot
 from dotenv import load_dotenv
+import weakref
+import httpx
 import os
 import asyncio
 import json
 
 load_dotenv()
 
+MAX_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "50"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+# httpx pools belong to the event loop that opened them, so clients are kept per loop
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client(client_timeout: int = 480) -> AsyncAnthropic:
+    """Shared AsyncAnthropic for the running loop, one per timeout, created lazily"""
+    loop = asyncio.get_running_loop()
+    loop_clients = _clients.setdefault(loop, {})
+    key = (client_timeout, MAX_CONNECTIONS, MAX_KEEPALIVE_CONNECTIONS)
+    client = loop_clients.get(key)
+    if client is None:
+        client = AsyncAnthropic(
+            timeout=client_timeout,
+            http_client=DefaultAsyncHttpxClient(
+                timeout=client_timeout,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            ),
+        )
+        loop_clients[key] = client
+    return client
+
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _with_cache_control(block: Dict[str, Any]) -> Dict[str, Any]:
+    return {**block, "cache_control": CACHE_CONTROL}
+
+
+def _cache_last_message(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Copy of messages with a breakpoint on the last cacheable block of the last message"""
+    if not messages:
+        return messages
+    last = messages[-1]
+    content = last.get("content")
+    if isinstance(content, str):
+        if not content:
+            return messages
+        content = [_with_cache_control({"type": "text", "text": content})]
+    elif isinstance(content, list):
+        content = list(content)
+        # thinking blocks cannot carry cache_control
+        for i in range(len(content) - 1, -1, -1):
+            block = content[i]
+            if isinstance(block, dict) and block.get("type") not in (
+                "thinking",
+                "redacted_thinking",
+            ):
+                content[i] = _with_cache_control(block)
+                break
+        else:
+            return messages
+    else:
+        return messages
+    return messages[:-1] + [{**last, "content": content}]
+
+
+def _append_to_last_turn(
+    messages: List[Dict[str, Any]], text: str
+) -> List[Dict[str, Any]]:
+    """Copy of messages with text added at the end of the latest user turn"""
+    block = {"type": "text", "text": text}
+    if not messages or messages[-1].get("role") != "user":
+        return messages + [{"role": "user", "content": [block]}]
+    last = messages[-1]
+    content = last.get("content")
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}] if content else []
+    return messages[:-1] + [{**last, "content": list(content or []) + [block]}]
+
+
+class _SlotStream:
+    """
+    Streaming response that holds its model_calls slot while the model generates.
+
+    The slot is given back once the message is complete (a stop_reason or
+    message_stop arrives), when the stream ends or fails, or when it is closed, so
+    the budget bounds streams in flight and not just their setup. Tools run while
+    the caller is still iterating, after generation ended, do not hold the slot.
+    """
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            event = await self._stream.__anext__()
+        except BaseException:
+            self._release()
+            raise
+        if event.type == "message_stop" or (
+            event.type == "message_delta"
+            and getattr(event.delta, "stop_reason", None) is not None
+        ):
+            self._release()
+        return event
+
+    async def close(self):
+        try:
+            await self._stream.close()
+        finally:
+            self._release()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __del__(self):
+        # Abandoned without being read to the end or closed
+        self._release()
+
+
+async def close_clients():
+    """Close the pooled clients of the running loop (call on shutdown)"""
+    loop_clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in loop_clients.values():
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"\n[model_call]: error closing client: {e}")
+
 
 async def model_call(
     input: Union[List[Dict[str, Any]], str],
@@ -18,8 +157,19 @@ async def model_call(
     thinking=False,
     max_tokens: int = 8000,
     client_timeout: int = 480,
+    cache_breakpoints: Optional[List[str]] = None,
+    turn_context: Optional[str] = None,
 ):
-    client = AsyncAnthropic(timeout=client_timeout)
+    """
+    cache_breakpoints: prompt-cache breakpoints to place, any of
+    - "tools": after the last tool definition
+    - "system": after the first (stable) system prompt; later system prompts follow uncached
+    - "history": after the last message of the conversation prefix
+    turn_context: text that changes from turn to turn, appended to the latest user
+    turn after the history breakpoint so it never invalidates the cached prefix
+    """
+    client = get_client(client_timeout)
+    cache_breakpoints = set(cache_breakpoints or [])
     retries = 3
     sleep_time = 2
 
@@ -79,11 +229,28 @@ async def model_call(
     api_parameters = {"model": model}
 
     if system_prompts:
-        api_parameters["system"] = "\n".join(system_prompts)
+        if "system" in cache_breakpoints:
+            api_parameters["system"] = [
+                _with_cache_control({"type": "text", "text": system_prompts[0]})
+            ]
+            if len(system_prompts) > 1:
+                api_parameters["system"].append(
+                    {"type": "text", "text": "\n".join(system_prompts[1:])}
+                )
+        else:
+            api_parameters["system"] = "\n".join(system_prompts)
 
     if tools:
+        if "tools" in cache_breakpoints:
+            tools = tools[:-1] + [_with_cache_control(tools[-1])]
         api_parameters["tools"] = tools
 
+    if "history" in cache_breakpoints:
+        messages = _cache_last_message(messages)
+
+    if turn_context:
+        messages = _append_to_last_turn(messages, turn_context)
+
     if tool_choice:
         api_parameters["tool_choice"] = tool_choice
 
@@ -102,7 +269,15 @@ async def model_call(
 
     for attempt in range(retries):
         try:
-            response = await client.messages.create(**api_parameters)
+            release = await acquire_slot("model_calls")
+            try:
+                response = await client.messages.create(**api_parameters)
+            except BaseException:
+                release()
+                raise
+            if stream:
+                return _SlotStream(response, release)
+            release()
             return response
 
         except Exception as e:
@@ -1,7 +1,16 @@
-from jupyter_client import BlockingKernelClient
+from jupyter_client import AsyncKernelClient
 from cache.state import RedisStateManager
 from utils.helpers import KERNEL_PID_DIR
-from utils.files import ensure_claude_workspace
+from utils.files import ensure_claude_workspace, workspace_tracker
+from utils.concurrency import concurrency_slot
+from sandbox.kernel_resources import (
+    KERNEL_EXECUTION_TIMEOUT,
+    KERNEL_INTERRUPT_GRACE,
+    ExecutionMetrics,
+    apply_kernel_limits,
+    interrupt_kernel,
+    kernel_pid,
+)
 import subprocess
 import asyncio
 import pathlib
@@ -15,11 +24,61 @@ import sys
 import re
 import os
 
+# Output streamed per execution, chunks buffered for the stream's reader, seconds
+# reading the kernel's output may wait for that reader once the buffer is full,
+# and seconds without output between heartbeats
+KERNEL_STREAM_MAX_BYTES = int(os.getenv("KERNEL_STREAM_MAX_BYTES", "65536"))
+KERNEL_STREAM_QUEUE_SIZE = int(os.getenv("KERNEL_STREAM_QUEUE_SIZE", "256"))
+KERNEL_STREAM_PUT_WAIT = float(os.getenv("KERNEL_STREAM_PUT_WAIT", "0.5"))
+KERNEL_STREAM_HEARTBEAT = float(os.getenv("KERNEL_STREAM_HEARTBEAT", "1"))
+
 ############################################################################################################
 
+# Connected clients per Claude (with the event loop their sockets belong to), reused
+# across executions while the kernel lives so each call skips the connect handshake
+_clients = {}
+
+
+def close_kernel_client(claude_id):
+    """Disconnect the cached client of a Claude's kernel, if any"""
+    entry = _clients.pop(claude_id, None)
+    if entry is not None:
+        try:
+            entry[0].stop_channels()
+        except Exception as e:
+            print(f"Error closing kernel client for claude {claude_id}: {e}")
+
+
+def _cached_client(claude_id):
+    entry = _clients.get(claude_id)
+    if entry is None:
+        return None
+    kc, loop = entry
+    if loop is not asyncio.get_running_loop():
+        close_kernel_client(claude_id)
+        return None
+    return kc
+
+
+def cache_kernel_client(claude_id, kc):
+    """Reuse kc for the Claude's executions until its kernel is cleaned up"""
+    _clients[claude_id] = (kc, asyncio.get_running_loop())
+
+
+async def connect_kernel_client(kernel_connection_file, timeout=None):
+    """AsyncKernelClient connected to a running kernel, ready to execute"""
+    kc = AsyncKernelClient(connection_file=kernel_connection_file)
+    kc.load_connection_file()
+    kc.start_channels()
+    # Also makes sure iopub is subscribed before any code runs
+    await kc.wait_for_ready(timeout=timeout)
+    return kc
+
 
 def cleanup_user_kernels(claude_id):
     redis_state = RedisStateManager()
+    close_kernel_client(claude_id)
+    workspace_tracker.forget(claude_id)
     user_pid_dir = os.path.join(KERNEL_PID_DIR, claude_id)
     kernel_connection_file = os.path.join(
         os.getcwd(), f"kernel_connection_file_{claude_id}.json"
@@ -78,35 +137,64 @@ def clean_traceback(traceback_list):
     return [ansi_escape.sub("", line) for line in traceback_list]
 
 
-async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeout=30.0):
+async def flush_kernel_msgs(
+    kc,
+    claude_id,
+    msg_id=None,
+    msg_fetch_timeout=2.0,
+    overall_timeout=30.0,
+    workspace_before=None,
+    metrics=None,
+    progress=None,
+    deadline=None,
+):
+    """
+    Collect iopub output of an execute request until the kernel goes idle.
+
+    kc is an AsyncKernelClient, so waiting for messages never blocks the event loop.
+    With msg_id, only messages whose parent is that request are taken, and the
+    request is done as soon as the kernel reports idle for it. workspace_before is
+    the workspace snapshot taken before the request was sent, used to report the
+    files it created or modified. metrics (an ExecutionMetrics) counts output bytes.
+    stdout / stderr text is also handed to progress (an OutputChunks) as it
+    arrives, which never makes the execution wait for its reader. Collection gives
+    up after overall_timeout seconds without output, or at deadline (loop time).
+    """
     task_results = []
     output = None
     error = None
     kernel_done = False
     meaningful_output = False
+    code = ""
 
-    # Track files before execution to detect new files
     user_folder = ensure_claude_workspace(claude_id)
-    files_before = (
-        set(os.listdir(user_folder)) if os.path.exists(user_folder) else set()
-    )
+    if workspace_before is None:
+        workspace_before = await asyncio.to_thread(workspace_tracker.begin, claude_id)
 
     # Track files created during kernel output processing (to avoid duplicates)
     kernel_created_files = set()
 
-    last_message_time = asyncio.get_event_loop().time()
+    loop = asyncio.get_running_loop()
+    last_message_time = loop.time()
     while True:
-        current_time = asyncio.get_event_loop().time()
-        if current_time - last_message_time > overall_timeout:
+        current_time = loop.time()
+        if current_time - last_message_time > overall_timeout or (
+            deadline is not None and current_time > deadline
+        ):
             kernel_done = True
             break
         try:
-            msg = kc.get_iopub_msg(timeout=msg_fetch_timeout)
-            last_message_time = asyncio.get_event_loop().time()
+            msg = await kc.get_iopub_msg(timeout=msg_fetch_timeout)
+            # Output of other requests (e.g. an earlier, abandoned execution)
+            if msg_id is not None and msg["parent_header"].get("msg_id") != msg_id:
+                continue
+            last_message_time = loop.time()
             msg_type = msg["msg_type"]
             if msg_type == "status":
                 execution_state = msg["content"]["execution_state"]
-                if execution_state == "idle" and meaningful_output:
+                if execution_state == "idle" and (
+                    meaningful_output or msg_id is not None
+                ):
                     kernel_done = True
                     break
             elif msg_type == "execute_input":
@@ -121,6 +209,8 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
                     output = content
                 if "image/png" in msg["content"].get("data", {}):
                     image_data = msg["content"]["data"]["image/png"]
+                    if metrics is not None:
+                        metrics.output_bytes += len(image_data) * 3 // 4
                     output_filename = f"kernel_image{int(time.time())}.png"
                     output_path = os.path.join(user_folder, output_filename)
                     with open(output_path, "wb") as img_file:
@@ -131,6 +221,11 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
                 if content:
                     meaningful_output = True
                     task_results.append(content)
+                    if (
+                        metrics is not None
+                        and "image/png" not in msg["content"]["data"]
+                    ):
+                        metrics.output_bytes += len(content.encode("utf-8"))
             elif msg_type == "stream":
                 stream_name = msg["content"]["name"]
                 content = msg["content"]["text"]
@@ -138,6 +233,10 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
                 if content:
                     meaningful_output = True
                     task_results.append(content)
+                    if metrics is not None:
+                        metrics.output_bytes += len(content.encode("utf-8"))
+                    if progress is not None:
+                        await progress.put(content)
             elif msg_type == "error":
                 error_content = msg["content"]
                 traceback_lines = clean_traceback(error_content.get("traceback", []))
@@ -145,9 +244,10 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
                 error = f"{error_message} at:\n" + "\n".join(traceback_lines)
                 output = error
                 kernel_done = True
-                break
+                # Wait for this request's idle, or the kernel aborts the next one
+                if msg_id is None:
+                    break
         except queue.Empty:
-            await asyncio.sleep(0.1)
             continue
 
         except Exception as e:
@@ -157,13 +257,26 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
     if not kernel_done and current_time - last_message_time > overall_timeout:
         error = "kernel execution timed out."
 
-    files_after = set(os.listdir(user_folder)) if os.path.exists(user_folder) else set()
-    new_files = files_after - files_before
+    changes = await asyncio.to_thread(
+        workspace_tracker.changes, claude_id, workspace_before
+    )
 
     file_outputs = []
     file_list = []
 
-    for filename in new_files:
+    for filename, size in changes.modified.items():
+        file_ext = os.path.splitext(filename)[1].lower()
+        file_list.append(
+            {
+                "name": filename,
+                "type": file_ext[1:] if file_ext else "unknown",
+                "path": os.path.join(user_folder, filename),
+                "size": size,
+                "status": "modified",
+            }
+        )
+
+    for filename, size in changes.created.items():
         if filename in kernel_created_files:
             file_ext = os.path.splitext(filename)[1].lower()
             file_list.append(
@@ -171,6 +284,8 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
                     "name": filename,
                     "type": file_ext[1:] if file_ext else "unknown",
                     "url": output if output else None,
+                    "size": size,
+                    "status": "created",
                 }
             )
             continue
@@ -181,14 +296,30 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
         if file_ext == ".pdf":
             ##############cant render pdfs
             pdf_url = f"/api/files/serve/{filename}"
-            file_list.append({"name": filename, "type": "pdf", "url": pdf_url})
+            file_list.append(
+                {
+                    "name": filename,
+                    "type": "pdf",
+                    "url": pdf_url,
+                    "size": size,
+                    "status": "created",
+                }
+            )
             task_results.append(f"PDF generated: {filename}")
 
         elif file_ext in [".png", ".jpg", ".jpeg", ".gif", ".bmp"]:
             ########## can render images
             img_url = f"/api/files/serve/{filename}"
             file_outputs.append(img_url)
-            file_list.append({"name": filename, "type": "image", "url": img_url})
+            file_list.append(
+                {
+                    "name": filename,
+                    "type": "image",
+                    "url": img_url,
+                    "size": size,
+                    "status": "created",
+                }
+            )
             task_results.append(f"Image generated: {filename}")
 
         ########Other files (CSV, TXT, JSON, etc.) - just list them
@@ -198,6 +329,8 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
                     "name": filename,
                     "type": file_ext[1:] if file_ext else "unknown",
                     "path": file_path,
+                    "size": size,
+                    "status": "created",
                 }
             )
 
@@ -206,12 +339,10 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
 
     if error:
         return error, error, file_list
-    elif task_results or new_files:
+    elif task_results or changes:
         combined_results = "\n".join(task_results)
-        if new_files and not task_results:
-            combined_results = (
-                f"Generated {len(new_files)} file(s): {', '.join(new_files)}"
-            )
+        if changes and not task_results:
+            combined_results = changes.describe()
         return combined_results, output, file_list
     else:
         return (
@@ -224,22 +355,248 @@ async def flush_kernel_msgs(kc, claude_id, msg_fetch_timeout=2.0, overall_timeou
         )
 
 
+async def _execute_reply(kc, msg_id, timeout):
+    """The shell reply to msg_id, or None if it does not come within timeout"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return None
+        try:
+            reply = await kc.get_shell_msg(timeout=remaining)
+        except queue.Empty:
+            return None
+        # Replies to earlier requests are dropped here
+        if reply["parent_header"].get("msg_id") == msg_id:
+            return reply
+
+
+async def execute_code(
+    kc,
+    code,
+    claude_id,
+    msg_fetch_timeout=2.0,
+    overall_timeout=30.0,
+    execution_timeout=KERNEL_EXECUTION_TIMEOUT,
+    progress=None,
+):
+    """
+    Run code on the kernel and collect the output of that request.
+
+    The kernel is interrupted once the execution has run for execution_timeout
+    seconds, however long it has been silent until then. A kernel that does not
+    stop within KERNEL_INTERRUPT_GRACE seconds of the interrupt is killed, so it
+    never stays busy with runaway code. Without a time limit, collection gives up
+    after overall_timeout seconds of silence and leaves the code running. Returns
+    (results, output, file_list, metrics), metrics being the ExecutionMetrics of
+    the request.
+    """
+    # TTL cleanup (optimistic_kernel_cleanup) must not kill the kernel while it runs
+    RedisStateManager().extend_kernel_ttl(
+        claude_id,
+        int((execution_timeout or 3600) + KERNEL_INTERRUPT_GRACE + overall_timeout)
+        + 120,
+    )
+    workspace_before = await asyncio.to_thread(workspace_tracker.begin, claude_id)
+    pid = kernel_pid(claude_id)
+    metrics = ExecutionMetrics(pid)
+    interrupted = None
+
+    def interrupt():
+        nonlocal interrupted
+        interrupted = f"after the {execution_timeout:g}s time limit"
+        interrupt_kernel(pid)
+
+    loop = asyncio.get_running_loop()
+    msg_id = kc.execute(code)
+    timer = None
+    deadline = None
+    collect_timeout = overall_timeout
+    if pid is not None and execution_timeout:
+        timer = loop.call_later(execution_timeout, interrupt)
+        # Silent code (e.g. a model fit) keeps running until the time limit; after
+        # it, the interrupt gets KERNEL_INTERRUPT_GRACE seconds to take effect
+        deadline = loop.time() + execution_timeout + KERNEL_INTERRUPT_GRACE
+        collect_timeout = execution_timeout + KERNEL_INTERRUPT_GRACE
+    try:
+        results, output, file_list = await flush_kernel_msgs(
+            kc,
+            claude_id,
+            msg_id,
+            msg_fetch_timeout,
+            collect_timeout,
+            workspace_before,
+            metrics,
+            progress,
+            deadline,
+        )
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+    # Interrupted, yet no reply: the kernel ignored the interrupt
+    if interrupted and await _execute_reply(kc, msg_id, 1.0) is None:
+        cleanup_user_kernels(claude_id)
+        interrupted += (
+            "; the kernel did not respond and was restarted, so its variables"
+            " are lost"
+        )
+
+    metrics = metrics.finish()
+    metrics["interrupted"] = interrupted is not None
+    if interrupted:
+        results = f"Execution interrupted {interrupted}.\n" + results
+    return results, output, file_list, metrics
+
+
+class OutputChunks:
+    """
+    Bounded buffer of an execution's output for stream_code.
+
+    When the buffer is full, put() waits up to wait seconds for the reader (the
+    back-pressure on iopub reads). If the reader does not make room in time, text
+    is skipped (and counted) without waiting until the reader has emptied the
+    buffer, so a paused consumer stalls the kernel's output once, for at most
+    wait seconds. The execution result still has all the output.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = KERNEL_STREAM_QUEUE_SIZE,
+        wait: float = KERNEL_STREAM_PUT_WAIT,
+    ):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.wait = wait
+        self.skipped_bytes = 0
+        self.total_skipped_bytes = 0
+        self._lagging = False
+
+    async def put(self, text: str) -> None:
+        if self._lagging and self.queue.empty():
+            self._lagging = False
+        if self.queue.full() and not self._lagging:
+            try:
+                await asyncio.wait_for(self.queue.put(text), self.wait)
+                return
+            except asyncio.TimeoutError:
+                self._lagging = True
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            skipped = len(text.encode("utf-8"))
+            self.skipped_bytes += skipped
+            self.total_skipped_bytes += skipped
+
+    def take_skipped(self) -> int:
+        skipped, self.skipped_bytes = self.skipped_bytes, 0
+        return skipped
+
+
+async def _execute_in_slot(kc, code, claude_id, **kwargs):
+    async with concurrency_slot("kernels"):
+        return await execute_code(kc, code, claude_id, **kwargs)
+
+
+async def stream_code(
+    kc, code, claude_id, max_stream_bytes=KERNEL_STREAM_MAX_BYTES, **kwargs
+):
+    """
+    Run code like execute_code, yielding its output while it runs.
+
+    Yields ("output", text) for stdout / stderr, coalescing whatever queued up
+    while the consumer was busy, ("heartbeat", None) after each
+    KERNEL_STREAM_HEARTBEAT seconds without output, and finally
+    ("result", execute_code's return value). At most max_stream_bytes of output are
+    streamed; the result still has all of it, and says how many bytes the stream
+    left out (past the cap, or skipped while the consumer lagged). Closing the
+    generator early interrupts the kernel.
+
+    The execution runs in its own task, holding one slot of the "kernels" budget
+    only while the kernel runs: the consumer's pace (or a paused consumer) never
+    holds a slot, and stalls the kernel's output for at most KERNEL_STREAM_PUT_WAIT
+    seconds at a time.
+    """
+    output = OutputChunks()
+    chunks = output.queue
+    task = asyncio.create_task(
+        _execute_in_slot(kc, code, claude_id, progress=output, **kwargs)
+    )
+    streamed = 0
+    # Output bytes sent to the consumer and taken from the buffer, notes aside
+    shown = 0
+    total = 0
+    try:
+        while True:
+            getter = asyncio.ensure_future(chunks.get())
+            await asyncio.wait(
+                {getter, task},
+                timeout=KERNEL_STREAM_HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not getter.done():
+                getter.cancel()
+                if task.done():
+                    break
+                yield "heartbeat", None
+                continue
+            parts = [getter.result()]
+            while not chunks.empty():
+                parts.append(chunks.get_nowait())
+            size = sum(len(part.encode("utf-8")) for part in parts)
+            total += size
+            if streamed >= max_stream_bytes:
+                continue
+            skipped = output.take_skipped()
+            note = ""
+            if skipped:
+                note = f"[{skipped} bytes of output skipped while catching up]\n"
+            text = note + "".join(parts)
+            encoded = text.encode("utf-8")
+            streamed += len(encoded)
+            shown += size
+            if streamed > max_stream_bytes:
+                keep = max_stream_bytes - (streamed - len(encoded))
+                shown -= min(len(encoded) - keep, size)
+                text = encoded[:keep].decode("utf-8", "ignore")
+                text += "\n[further output is not streamed]\n"
+            yield "output", text
+        results, result_output, file_list, metrics = task.result()
+        not_shown = total + output.total_skipped_bytes - shown
+        if not_shown > 0:
+            results += (
+                f"\n[{not_shown} bytes of this output were not shown to the user"
+                " while the code ran]"
+            )
+        yield "result", (results, result_output, file_list, metrics)
+    finally:
+        if not task.done():
+            pid = kernel_pid(claude_id)
+            if pid is not None:
+                interrupt_kernel(pid)
+                # Let the request end (error, then idle), or the kernel aborts the
+                # next one; its output is no longer wanted
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + 5
+                while not task.done() and loop.time() < deadline:
+                    while not chunks.empty():
+                        chunks.get_nowait()
+                    await asyncio.wait({task}, timeout=0.1)
+            if task.done():
+                if not task.cancelled():
+                    task.exception()
+            else:
+                task.cancel()
+
+
 ############################################################################################################
 
 
-async def start_kernel(claude_id, msg_fetch_timeout=2.0):
-    redis_state = RedisStateManager()
-    workspace = ensure_claude_workspace(claude_id)
-    kernel_connection_file = os.path.join(
-        os.getcwd(), f"kernel_connection_file_{claude_id}.json"
-    )
-    if os.path.isfile(kernel_connection_file):
-        os.remove(kernel_connection_file)
+async def launch_kernel_process(kernel_connection_file, cwd, on_spawn=None):
+    """Start an ipykernel subprocess and wait until it has written its connection file"""
     launch_kernel_script_path = os.path.join(
         pathlib.Path(__file__).parent.resolve(), "launch_kernel.py"
     )
-    user_pid_dir = os.path.join(KERNEL_PID_DIR, claude_id)
-    os.makedirs(user_pid_dir, exist_ok=True)
     kernel_process = await asyncio.to_thread(
         subprocess.Popen,
         [
@@ -250,33 +607,58 @@ async def start_kernel(claude_id, msg_fetch_timeout=2.0):
             "--matplotlib=inline",
             "--quiet",
         ],
-        cwd=workspace,
+        cwd=cwd,
     )
+    try:
+        apply_kernel_limits(kernel_process.pid)
+    except Exception as e:
+        print(f"Error applying resource limits to kernel {kernel_process.pid}: {e}")
+    if on_spawn is not None:
+        on_spawn(kernel_process)
 
-    with open(os.path.join(user_pid_dir, f"{kernel_process.pid}.pid"), "w") as p:
-        p.write("kernel")
-
-    redis_state.set_kernel_pid(claude_id, kernel_process.pid)
     while not await asyncio.to_thread(os.path.isfile, kernel_connection_file):
         await asyncio.sleep(0.1)
     with open(kernel_connection_file, "r") as fp:
         json.load(fp)
-    kc = BlockingKernelClient(connection_file=kernel_connection_file)
-    kc.load_connection_file()
-    kc.start_channels()
-    kc.wait_for_ready()
+    return kernel_process
+
 
-    flusher_task = asyncio.create_task(
-        flush_kernel_msgs(kc, claude_id, msg_fetch_timeout)
+async def start_kernel(claude_id, pool=None):
+    """Kernel for the Claude, leased from the pre-warmed pool if possible"""
+    if pool is not None:
+        kc = await pool.lease(claude_id)
+        if kc is not None:
+            return kc
+
+    redis_state = RedisStateManager()
+    workspace = ensure_claude_workspace(claude_id)
+    kernel_connection_file = os.path.join(
+        os.getcwd(), f"kernel_connection_file_{claude_id}.json"
     )
+    if os.path.isfile(kernel_connection_file):
+        os.remove(kernel_connection_file)
+    user_pid_dir = os.path.join(KERNEL_PID_DIR, claude_id)
+    os.makedirs(user_pid_dir, exist_ok=True)
 
-    return kc, flusher_task
+    def record_pid(kernel_process):
+        with open(os.path.join(user_pid_dir, f"{kernel_process.pid}.pid"), "w") as p:
+            p.write("kernel")
+        redis_state.set_kernel_pid(claude_id, kernel_process.pid)
+
+    await launch_kernel_process(kernel_connection_file, workspace, record_pid)
+    kc = await connect_kernel_client(kernel_connection_file)
+    cache_kernel_client(claude_id, kc)
+    return kc
 
 
 ############################################################################################################end
 
 
-async def get_or_create_persistent_kernel(claude_id: str):
+async def get_or_create_persistent_kernel(claude_id: str, pool=None):
+    """
+    Connected AsyncKernelClient for the Claude's kernel (cached while the kernel lives).
+    A new kernel is leased from pool (a KernelPool) when it has one ready.
+    """
 
     user_pid_dir = os.path.join(KERNEL_PID_DIR, claude_id)
     kernel_connection_file = os.path.join(
@@ -300,16 +682,14 @@ async def get_or_create_persistent_kernel(claude_id: str):
                         os.remove(os.path.join(user_pid_dir, pid_file))
 
             if kernel_alive:
-                kc = BlockingKernelClient(connection_file=kernel_connection_file)
-                kc.load_connection_file()
-                kc.start_channels()
+                kc = _cached_client(claude_id)
+                if kc is None:
+                    kc = await connect_kernel_client(kernel_connection_file, timeout=30)
+                    cache_kernel_client(claude_id, kc)
 
                 ensure_claude_workspace(claude_id)
 
-                flusher_task = asyncio.create_task(
-                    flush_kernel_msgs(kc, claude_id, 2.0)
-                )
-                return kc, flusher_task
+                return kc
             else:
                 pass  # avoid clash with rich Live implement logging if needed
 
@@ -318,4 +698,4 @@ async def get_or_create_persistent_kernel(claude_id: str):
 
     ######### create new kernel if none exists locally
     cleanup_user_kernels(claude_id)
-    return await start_kernel(claude_id)
+    return await start_kernel(claude_id, pool)
@@ -0,0 +1,222 @@
+from cache.state import RedisStateManager
+from utils.helpers import KERNEL_PID_DIR, KERNEL_POOL_DIR
+from utils.files import ensure_claude_workspace
+from sandbox.kernel import (
+    cache_kernel_client,
+    connect_kernel_client,
+    launch_kernel_process,
+)
+from collections import deque
+from typing import Dict, Optional
+import asyncio
+import signal
+import uuid
+import os
+
+# Kernels kept started and idle, and modules imported into them ahead of time
+KERNEL_POOL_SIZE = int(os.getenv("KERNEL_POOL_SIZE", "2"))
+KERNEL_POOL_PRELOAD = os.getenv("KERNEL_POOL_PRELOAD", "numpy,pandas")
+# Concurrent kernel starts while refilling the pool
+KERNEL_POOL_REFILL_CONCURRENCY = int(os.getenv("KERNEL_POOL_REFILL_CONCURRENCY", "1"))
+
+# Imported into sys.modules only, so the user namespace starts out empty; modules
+# that are not installed are skipped
+_PRELOAD_CODE = """
+for _module in {modules!r}:
+    try:
+        __import__(_module)
+    except ImportError:
+        pass
+del _module
+"""
+
+
+async def _run_silently(kc, code, timeout=60.0):
+    """Execute code without history or execute_input, and wait for its reply"""
+    msg_id = kc.execute(code, silent=True, store_history=False)
+    while True:
+        reply = await kc.get_shell_msg(timeout=timeout)
+        if reply["parent_header"].get("msg_id") == msg_id:
+            break
+    if reply["content"]["status"] != "ok":
+        raise RuntimeError(reply["content"].get("evalue", "kernel setup failed"))
+
+
+class _PooledKernel:
+    def __init__(self, process, connection_file, kc):
+        self.process = process
+        self.connection_file = connection_file
+        self.kc = kc
+
+
+class KernelPool:
+    """
+    Kernels started ahead of time, with KERNEL_POOL_PRELOAD already imported.
+
+    A Claude without a kernel leases one instead of waiting for a new process:
+    the kernel is moved into the Claude's workspace (os.chdir) and its connection
+    file and pid are handed over to the usual per-Claude locations, so TTL cleanup
+    treats it like any other kernel. Each lease triggers a refill in the background,
+    starting at most refill_concurrency kernels at a time. Pool kernels keep their
+    files under KERNEL_POOL_DIR, so stale ones can be killed on the next start().
+    """
+
+    def __init__(
+        self,
+        size: int = KERNEL_POOL_SIZE,
+        preload: str = KERNEL_POOL_PRELOAD,
+        refill_concurrency: int = KERNEL_POOL_REFILL_CONCURRENCY,
+        pool_dir: str = KERNEL_POOL_DIR,
+    ):
+        self.size = size
+        self.modules = [m.strip() for m in preload.split(",") if m.strip()]
+        self.pool_dir = pool_dir
+        self._ready: deque = deque()
+        self._starting = 0
+        self._tasks = set()
+        self._start_slots = asyncio.Semaphore(max(refill_concurrency, 1))
+        self._stats = {"leases": 0, "misses": 0, "started": 0, "failed": 0}
+
+    def _pid_file(self, pid: int) -> str:
+        return os.path.join(self.pool_dir, f"{pid}.pid")
+
+    def start(self) -> None:
+        """Kill kernels left over by a previous run and fill the pool"""
+        os.makedirs(self.pool_dir, exist_ok=True)
+        for name in os.listdir(self.pool_dir):
+            path = os.path.join(self.pool_dir, name)
+            if name.endswith(".pid"):
+                try:
+                    os.kill(int(name.split(".pid")[0]), signal.SIGKILL)
+                except (OSError, ValueError):
+                    pass
+            os.remove(path)
+        self._refill()
+
+    def _refill(self) -> None:
+        missing = self.size - len(self._ready) - self._starting
+        for _ in range(max(missing, 0)):
+            self._starting += 1
+            task = asyncio.create_task(self._warm_kernel())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _warm_kernel(self) -> None:
+        connection_file = os.path.join(self.pool_dir, f"kernel_{uuid.uuid4().hex}.json")
+        process = None
+        kc = None
+        ready = False
+
+        def record_pid(kernel_process):
+            nonlocal process
+            process = kernel_process
+            with open(self._pid_file(kernel_process.pid), "w") as p:
+                p.write("kernel")
+
+        try:
+            async with self._start_slots:
+                await launch_kernel_process(connection_file, self.pool_dir, record_pid)
+                kc = await connect_kernel_client(connection_file, timeout=60)
+                if self.modules:
+                    await _run_silently(kc, _PRELOAD_CODE.format(modules=self.modules))
+            self._ready.append(_PooledKernel(process, connection_file, kc))
+            self._stats["started"] += 1
+            ready = True
+        except Exception as e:
+            print(f"Error starting pooled kernel: {e}")
+            self._stats["failed"] += 1
+        finally:
+            self._starting -= 1
+            # Also when cancelled by stop()
+            if not ready:
+                self._discard(process, connection_file, kc)
+
+    def _discard(self, process, connection_file, kc=None) -> None:
+        if kc is not None:
+            kc.stop_channels()
+        if process is not None:
+            process.kill()
+            self._remove(self._pid_file(process.pid))
+        self._remove(connection_file)
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def lease(self, claude_id: str):
+        """A ready kernel bound to the Claude's workspace, or None if the pool is empty"""
+        while self._ready:
+            kernel = self._ready.popleft()
+            self._refill()
+            if kernel.process.poll() is not None:
+                self._discard(None, kernel.connection_file, kernel.kc)
+                continue
+            try:
+                kc = await self._bind(claude_id, kernel)
+            except Exception as e:
+                print(f"Error leasing pooled kernel to claude {claude_id}: {e}")
+                self._discard(kernel.process, kernel.connection_file, kernel.kc)
+                continue
+            self._stats["leases"] += 1
+            return kc
+        self._stats["misses"] += 1
+        self._refill()
+        return None
+
+    async def _bind(self, claude_id: str, kernel: _PooledKernel):
+        workspace = ensure_claude_workspace(claude_id)
+        await _run_silently(
+            kernel.kc, f"import os as _os\n_os.chdir({workspace!r})\ndel _os", 10
+        )
+
+        # Hand the kernel over to the per-Claude files used by reconnects and cleanup
+        kernel_connection_file = os.path.join(
+            os.getcwd(), f"kernel_connection_file_{claude_id}.json"
+        )
+        os.replace(kernel.connection_file, kernel_connection_file)
+        user_pid_dir = os.path.join(KERNEL_PID_DIR, claude_id)
+        os.makedirs(user_pid_dir, exist_ok=True)
+        pid = kernel.process.pid
+        with open(os.path.join(user_pid_dir, f"{pid}.pid"), "w") as p:
+            p.write("kernel")
+        self._remove(self._pid_file(pid))
+        RedisStateManager().set_kernel_pid(claude_id, pid)
+
+        cache_kernel_client(claude_id, kernel.kc)
+        return kernel.kc
+
+    def stats(self) -> Dict[str, int]:
+        stats = dict(self._stats)
+        stats["ready"] = len(self._ready)
+        stats["starting"] = self._starting
+        return stats
+
+    def stop(self) -> None:
+        """Kill the kernels that were never leased"""
+        for task in list(self._tasks):
+            task.cancel()
+        while self._ready:
+            kernel = self._ready.popleft()
+            self._discard(kernel.process, kernel.connection_file, kernel.kc)
+
+
+_kernel_pool: Optional[KernelPool] = None
+
+
+def get_kernel_pool() -> Optional[KernelPool]:
+    """Process-wide kernel pool, or None when KERNEL_POOL_SIZE is 0"""
+    global _kernel_pool
+    if KERNEL_POOL_SIZE < 1:
+        return None
+    if _kernel_pool is None:
+        _kernel_pool = KernelPool()
+    return _kernel_pool
+
+
+def shutdown_kernel_pool() -> None:
+    global _kernel_pool
+    if _kernel_pool is not None:
+        _kernel_pool.stop()
+        _kernel_pool = None
@@ -0,0 +1,131 @@
+from utils.helpers import KERNEL_PID_DIR
+from typing import Any, Dict, Optional
+import resource
+import signal
+import psutil
+import time
+import os
+
+# Limits applied to every kernel process (0 disables one). Memory is address space,
+# CPU is the total over the kernel's lifetime, and processes count all processes of
+# the user running the server, so those two are off by default
+KERNEL_MEMORY_LIMIT_MB = int(os.getenv("KERNEL_MEMORY_LIMIT_MB", "4096"))
+KERNEL_CPU_LIMIT_SECONDS = int(os.getenv("KERNEL_CPU_LIMIT_SECONDS", "0"))
+KERNEL_MAX_OPEN_FILES = int(os.getenv("KERNEL_MAX_OPEN_FILES", "1024"))
+KERNEL_MAX_PROCESSES = int(os.getenv("KERNEL_MAX_PROCESSES", "0"))
+# Wall-clock seconds one execution may run before the kernel is interrupted, and
+# seconds an interrupted execution gets to stop before the kernel is killed
+KERNEL_EXECUTION_TIMEOUT = float(os.getenv("KERNEL_EXECUTION_TIMEOUT", "600"))
+KERNEL_INTERRUPT_GRACE = float(os.getenv("KERNEL_INTERRUPT_GRACE", "10"))
+
+
+def _limits():
+    return [
+        (resource.RLIMIT_AS, KERNEL_MEMORY_LIMIT_MB * 1024 * 1024),
+        (resource.RLIMIT_CPU, KERNEL_CPU_LIMIT_SECONDS),
+        (resource.RLIMIT_NOFILE, KERNEL_MAX_OPEN_FILES),
+        (resource.RLIMIT_NPROC, KERNEL_MAX_PROCESSES),
+    ]
+
+
+def apply_kernel_limits(pid: int) -> None:
+    """
+    Set the kernel's rlimits from outside (prlimit), right after it is spawned.
+
+    Soft and hard limits are equal, so code in the kernel cannot raise them again,
+    and processes it starts inherit them. This runs before the kernel has written
+    its connection file, so before any user code can run.
+    """
+    process = psutil.Process(pid)
+    for limit, value in _limits():
+        if value <= 0:
+            continue
+        _, hard = process.rlimit(limit)
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        process.rlimit(limit, (value, value))
+
+
+def kernel_pid(claude_id: str) -> Optional[int]:
+    """Pid of the Claude's live kernel, from its pid file"""
+    user_pid_dir = os.path.join(KERNEL_PID_DIR, claude_id)
+    try:
+        pid_files = os.listdir(user_pid_dir)
+    except FileNotFoundError:
+        return None
+    for pid_file in pid_files:
+        if pid_file.endswith(".pid"):
+            return int(pid_file.split(".pid")[0])
+    return None
+
+
+def interrupt_kernel(pid: int) -> None:
+    """Raise KeyboardInterrupt in the code the kernel is running"""
+    try:
+        os.kill(pid, signal.SIGINT)
+    except ProcessLookupError:
+        pass
+
+
+def _peak_rss(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss(pid: int) -> None:
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def _cpu_seconds(process: psutil.Process) -> float:
+    cpu = process.cpu_times()
+    return cpu.user + cpu.system + cpu.children_user + cpu.children_system
+
+
+class ExecutionMetrics:
+    """
+    Wall time, CPU time, peak RSS and output size of one kernel execution.
+
+    Peak RSS is the kernel's high-water mark (VmHWM), reset when the execution
+    starts. Where it cannot be reset, it is the peak over the kernel's lifetime.
+    """
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self.output_bytes = 0
+        self._process = None
+        self._cpu_start = 0.0
+        if pid is not None:
+            try:
+                self._process = psutil.Process(pid)
+                self._cpu_start = _cpu_seconds(self._process)
+                _reset_peak_rss(pid)
+            except psutil.Error:
+                self._process = None
+        self._start = time.perf_counter()
+
+    def finish(self) -> Dict[str, Any]:
+        metrics = {
+            "wall_seconds": round(time.perf_counter() - self._start, 3),
+            "cpu_seconds": None,
+            "peak_rss_bytes": None,
+            "output_bytes": self.output_bytes,
+        }
+        if self._process is not None:
+            try:
+                metrics["cpu_seconds"] = round(
+                    _cpu_seconds(self._process) - self._cpu_start, 3
+                )
+            except psutil.Error:
+                pass
+            metrics["peak_rss_bytes"] = _peak_rss(self.pid)
+        return metrics
@@ -6,7 +6,13 @@ from cache.state import RedisStateManager
 from db.sqlite import init_db
 from utils.helpers import WORK_FOLDER, check_and_setup_env
 from utils.maintenance import redis_cleanup_listener
+from utils.streaming import STREAM_MODES
+from utils.concurrency import shutdown_tool_executor
+from browser._http import close_http_session
+from browser._convert_pool import shutdown_conversion_pool
 from sandbox.kernel import cleanup_user_kernels
+from sandbox.kernel_pool import get_kernel_pool, shutdown_kernel_pool
+from models.anthropic import close_clients
 import asyncio
 import os
 import json
@@ -27,6 +33,13 @@ RESET = "\033[0m"
 BOLD = "\033[1m"
 DIM = "\033[2m"
 
+PERSONALITIES = {
+    "1": "Curious, contemplative, generally interested in world",
+    "2": "Generally positive and upbeat, tends to notice opportunities and bright sides",
+    "3": "Generally cautious and skeptical, tends to notice risks and potential downsides",
+    "4": "Emotionally intense and dramatic, prone to deep feelings and passionate expression",
+}
+
 paused = {"value": False, "should_exit": False}
 log_file = None
 
@@ -103,7 +116,7 @@ def show_menu(claude_id, loop_counter, max_turns):
         return True
 
 
-async def main():
+async def main(stream_mode="coalesce"):
     """test entry point for autonomous Claude"""
     global log_file
 
@@ -122,21 +135,14 @@ async def main():
     print("4. Dostoevsky - Emotionally intense, dramatic")
     print("5. Custom - Enter your own")
 
-    personalities = {
-        "1": "Curious, contemplative, generally interested in world",
-        "2": "Generally positive and upbeat, tends to notice opportunities and bright sides",
-        "3": "Generally cautious and skeptical, tends to notice risks and potential downsides",
-        "4": "Emotionally intense and dramatic, prone to deep feelings and passionate expression",
-    }
-
     choice = input(f"{CYAN}Enter choice (1-5, default=1): {RESET}").strip()
 
     if choice == "5":
         personality = input(f"{CYAN}Enter custom personality: {RESET}").strip()
         if not personality:
-            personality = personalities["1"]
+            personality = PERSONALITIES["1"]
     else:
-        personality = personalities.get(choice, personalities["1"])
+        personality = PERSONALITIES.get(choice, PERSONALITIES["1"])
 
     max_turns = input(f"{CYAN}How many turns: {RESET}")
     max_turns = int(max_turns) if max_turns else 5
@@ -176,7 +182,9 @@ async def main():
     current_text = ""
     current_thinking = ""
 
-    claude_stream = run_claude_loop(agent, claude_id, stream_id, max_turns)
+    claude_stream = run_claude_loop(
+        agent, claude_id, stream_id, max_turns, stream_mode=stream_mode
+    )
 
     async for chunk in claude_stream:
         if paused["value"]:
@@ -191,22 +199,33 @@ async def main():
             loop_counter += 1
 
         if chunk.startswith("0:"):
-            char = json.loads(chunk[2:])
+            text = json.loads(chunk[2:])
             if len(current_text) == 0:
                 print(f"\n{BLUE}🤖 Claude: {RESET}", end="", flush=True)
                 log_write("\n🤖 Claude: ")
-            current_text += char
-            print(f"{BLUE}{char}{RESET}", end="", flush=True)
-            log_write(char)
+            current_text += text
+            print(f"{BLUE}{text}{RESET}", end="", flush=True)
+            log_write(text)
 
         elif chunk.startswith("g:"):
-            char = json.loads(chunk[2:])
+            text = json.loads(chunk[2:])
             if len(current_thinking) == 0:
                 print(f"\n{GREEN}🧠 Thinking: {RESET}", end="", flush=True)
                 log_write("\n🧠 Thinking: ")
-            current_thinking += char
-            print(f"{DIM}{char}{RESET}", end="", flush=True)
-            log_write(char)
+            current_thinking += text
+            print(f"{DIM}{text}{RESET}", end="", flush=True)
+            log_write(text)
+
+        elif chunk.startswith("2:"):
+            for data in json.loads(chunk[2:]):
+                if data.get("type") == "cache_usage":
+                    cache_line = (
+                        f"💾 Prompt cache: {data['cacheReadInputTokens']} read, "
+                        f"{data['cacheCreationInputTokens']} written, "
+                        f"{data['inputTokens']} uncached input tokens"
+                    )
+                    print(f"\n{DIM}{cache_line}{RESET}", flush=True)
+                    log_write(f"\n{cache_line}\n")
 
         elif chunk.startswith("b:"):
             current_text = ""
@@ -216,6 +235,13 @@ async def main():
             log_write(f"\n🔧 Tool: {data.get('toolName')}\n")
 
         elif chunk.startswith("a:"):
+            result = json.loads(chunk[2:]).get("result")
+            if isinstance(result, dict) and result.get("isPartial"):
+                # Tool progress, e.g. kernel output while the code runs
+                progress = result.get("progress", "")
+                print(f"{DIM}{progress}{RESET}", end="", flush=True)
+                log_write(progress)
+                continue
             print(f"{DIM}  ✓ Completed{RESET}", flush=True)
             log_write("  ✓ Completed\n")
 
@@ -247,6 +273,10 @@ async def startup():
     await init_db()
     # Start Redis cleanup listener
     cleanup_task = asyncio.create_task(redis_cleanup_listener())
+    # Start warming kernels so the first code execution does not wait for one
+    kernel_pool = get_kernel_pool()
+    if kernel_pool is not None:
+        kernel_pool.start()
 
     return cleanup_task
 
@@ -258,7 +288,13 @@ def shutdown(cleanup_task):
     # Cancel cleanup task
     cleanup_task.cancel()
 
-    # Cleanup all kernels on ttl
+    # Stop the blocking-tool thread pool, document conversion workers and drop pooled HTTP connections
+    shutdown_tool_executor()
+    shutdown_conversion_pool()
+    close_http_session()
+
+    # Kill pooled kernels that were never leased, then all kernels on ttl
+    shutdown_kernel_pool()
     user_ids = state_manager.get_all_kernel_users_with_ttl().keys()
     for user_id in user_ids:
         cleanup_user_kernels(user_id)
@@ -269,6 +305,7 @@ if __name__ == "__main__":
     # Usage:
     # python start.py                    # Terminal only with colors
     # python start.py --log output.log   # Terminal with colors + clean log file
+    # python start.py --stream-mode char # Legacy per-character streaming
 
     if not check_and_setup_env():
         print("❌ Environment setup failed. Exiting...")
@@ -277,6 +314,12 @@ if __name__ == "__main__":
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description="Sentient Claude")
     parser.add_argument("--log", type=str, help="Log file path (colors stripped)")
+    parser.add_argument(
+        "--stream-mode",
+        default="coalesce",
+        choices=STREAM_MODES,
+        help="char: typewriter, delta: per model delta, coalesce: batched chunks",
+    )
     args = parser.parse_args()
 
     # Open log file if specified
@@ -290,10 +333,11 @@ if __name__ == "__main__":
 
         try:
             # Run main app
-            await main()
+            await main(stream_mode=args.stream_mode)
         finally:
             # Shutdown
             shutdown(cleanup_task)
+            await close_clients()
 
             # Close log file
             if log_file:
@@ -0,0 +1,360 @@
+from entry.entries import MemoryManager
+from circadian.circadian_monitor import circadian_monitor
+from agent.sentient_claude import create_sentient_claude
+from tools.web_tools_ import browser_manager
+from claude_loop import run_claude_loop
+from cache.state import RedisStateManager
+from utils.concurrency import configure_limits
+from utils.helpers import check_and_setup_env
+from utils.files import format_size
+from models.anthropic import close_clients
+from start import (
+    PERSONALITIES,
+    BLUE,
+    CYAN,
+    DIM,
+    GREEN,
+    RESET,
+    YELLOW,
+    startup,
+    shutdown,
+)
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+import argparse
+import asyncio
+import json
+import sys
+
+load_dotenv()
+
+
+class ManagedClaude:
+    """Bookkeeping for one autonomous Claude driven by the supervisor"""
+
+    def __init__(self, claude_id: str, personality: str, max_turns: int):
+        self.claude_id = claude_id
+        self.personality = personality
+        self.max_turns = max_turns
+        self.stream_id = f"autonomous_{claude_id}"
+        self.status = "starting"  # starting | running | paused | stopped | finished
+        self.loop_counter = 0
+        self.task: Optional[asyncio.Task] = None
+        self.circadian_task: Optional[asyncio.Task] = None
+        self.resume_event = asyncio.Event()
+        self.resume_event.set()
+        self.current_text = ""
+
+
+class ClaudeSupervisor:
+    """
+    Start, pause, resume and stop many autonomous Claudes in one process.
+
+    Every Claude runs its own run_claude_loop generator and circadian monitor as
+    asyncio tasks. Model calls and kernel executions across all of them share the
+    global budget from utils.concurrency.
+    """
+
+    def __init__(
+        self,
+        time_scale: int = 60,
+        max_model_calls: Optional[int] = None,
+        max_kernels: Optional[int] = None,
+        on_chunk: Optional[Callable[[ManagedClaude, str], None]] = None,
+    ):
+        configure_limits(model_calls=max_model_calls, kernels=max_kernels)
+        self.time_scale = time_scale
+        self.agents: Dict[str, ManagedClaude] = {}
+        self.memory_manager = MemoryManager()
+        self.redis_state = RedisStateManager()
+        self.on_chunk = on_chunk or render_chunk
+
+    async def start_agent(
+        self,
+        personality: str,
+        claude_id: Optional[str] = None,
+        max_turns: int = 5,
+    ) -> str:
+        """Wake an existing Claude or create a new one and start its loop"""
+        if not claude_id:
+            claude_data = await self.memory_manager.create_claude(personality)
+            claude_id = claude_data["id"]
+
+        existing = self.agents.get(claude_id)
+        if existing and existing.task and not existing.task.done():
+            raise ValueError(f"Claude {claude_id} is already running")
+
+        managed = ManagedClaude(claude_id, personality, max_turns)
+        self.agents[claude_id] = managed
+
+        self.redis_state.init_claude_time(claude_id, time_scale=self.time_scale)
+        self.redis_state.set_streaming_state(claude_id, managed.stream_id, True)
+        agent = create_sentient_claude(personality, claude_id)
+
+        managed.circadian_task = asyncio.create_task(
+            circadian_monitor(claude_id, time_scale=self.time_scale)
+        )
+        managed.task = asyncio.create_task(self._drive(managed, agent))
+        managed.status = "running"
+        return claude_id
+
+    async def _drive(self, managed: ManagedClaude, agent) -> None:
+        """Consume one Claude's stream; blocking here back-pressures its loop"""
+        claude_stream = run_claude_loop(
+            agent, managed.claude_id, managed.stream_id, managed.max_turns
+        )
+        try:
+            async for chunk in claude_stream:
+                # A paused Claude stays suspended at its next yield
+                await managed.resume_event.wait()
+                if chunk.startswith("z:"):
+                    managed.loop_counter += 1
+                self.on_chunk(managed, chunk)
+        except Exception as e:
+            print(f"❌ Claude {managed.claude_id} crashed: {e}")
+        finally:
+            await claude_stream.aclose()
+            if managed.circadian_task:
+                managed.circadian_task.cancel()
+            # Its page content is not needed until it wakes again
+            browser_manager.evict(managed.claude_id)
+            if managed.status != "stopped":
+                managed.status = "finished"
+
+    def pause_agent(self, claude_id: str) -> None:
+        """Suspend a Claude at its next streamed chunk"""
+        managed = self.agents[claude_id]
+        if managed.status == "running":
+            managed.resume_event.clear()
+            managed.status = "paused"
+
+    def resume_agent(self, claude_id: str) -> None:
+        """Let a paused Claude continue"""
+        managed = self.agents[claude_id]
+        if managed.status == "paused":
+            managed.status = "running"
+            managed.resume_event.set()
+
+    async def stop_agent(self, claude_id: str, grace_period: float = 10.0) -> None:
+        """Ask a Claude to stop streaming, cancelling it if it does not comply"""
+        managed = self.agents[claude_id]
+        if not managed.task or managed.task.done():
+            return
+        managed.status = "stopped"
+        self.redis_state.set_streaming_state(claude_id, managed.stream_id, False)
+        managed.resume_event.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(managed.task), grace_period)
+        except asyncio.TimeoutError:
+            managed.task.cancel()
+            try:
+                await managed.task
+            except asyncio.CancelledError:
+                pass
+
+    async def stop_all(self) -> None:
+        await asyncio.gather(*(self.stop_agent(cid) for cid in list(self.agents)))
+
+    def send_message(self, claude_id: str, message: str) -> None:
+        """Queue an observer message for a Claude"""
+        self.redis_state.add_stimulus(
+            claude_id=claude_id, content=message, source="user"
+        )
+
+    def status(self) -> List[Dict]:
+        return [
+            {
+                "claude_id": m.claude_id,
+                "status": m.status,
+                "loop": m.loop_counter,
+                "max_turns": m.max_turns,
+            }
+            for m in self.agents.values()
+        ]
+
+    async def wait(self) -> None:
+        """Wait until every Claude has finished or been stopped"""
+        tasks = [m.task for m in self.agents.values() if m.task]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+###########################################################################
+
+
+def render_chunk(managed: ManagedClaude, chunk: str) -> None:
+    """Default renderer: one prefixed line per text block / tool event"""
+    prefix = f"{CYAN}[{managed.claude_id[:8]}]{RESET}"
+
+    def flush_text():
+        if managed.current_text.strip():
+            print(
+                f"{prefix} {BLUE}🤖 {managed.current_text.strip()}{RESET}", flush=True
+            )
+        managed.current_text = ""
+
+    if chunk.startswith("0:"):
+        managed.current_text += json.loads(chunk[2:])
+    elif chunk.startswith("b:"):
+        flush_text()
+        data = json.loads(chunk[2:])
+        print(f"{prefix} {YELLOW}🔧 Tool: {data.get('toolName')}{RESET}", flush=True)
+    elif chunk.startswith("d:"):
+        flush_text()
+        print(
+            f"{prefix} {DIM}--- Turn {managed.loop_counter}/{managed.max_turns} complete ---{RESET}",
+            flush=True,
+        )
+
+
+def _find_agent(supervisor: ClaudeSupervisor, prefix: str) -> Optional[str]:
+    matches = [cid for cid in supervisor.agents if cid.startswith(prefix)]
+    return matches[0] if len(matches) == 1 else None
+
+
+async def handle_command(supervisor: ClaudeSupervisor, line: str) -> bool:
+    """Apply one console command, return False to quit"""
+    parts = line.strip().split(maxsplit=2)
+    if not parts:
+        return True
+    command = parts[0].lower()
+
+    if command == "quit":
+        return False
+    if command == "list":
+        browsers = browser_manager.metrics()
+        for row in supervisor.status():
+            browser = browsers["browsers"].get(row["claude_id"])
+            browser_info = ""
+            if browser:
+                browser_info = f"  browser {format_size(browser['memory_bytes'])}, idle {browser['idle_seconds']:g}s"
+            print(
+                f"{DIM}{row['claude_id']}  {row['status']}  loop {row['loop']}/{row['max_turns']}{browser_info}{RESET}"
+            )
+        print(
+            f"{DIM}browsers: {browsers['live']} live ({format_size(browsers['total_memory_bytes'])}), "
+            f"{browsers['snapshots']} snapshots, {browsers['evictions']} evicted{RESET}"
+        )
+        return True
+    if command == "start":
+        personality = PERSONALITIES.get(
+            parts[1] if len(parts) > 1 else "1", PERSONALITIES["1"]
+        )
+        claude_id = await supervisor.start_agent(personality)
+        print(f"{GREEN}✓ Started {claude_id}{RESET}")
+        return True
+
+    if len(parts) < 2 or command not in ("pause", "resume", "stop", "msg"):
+        print(
+            f"{DIM}Commands: list | start [1-4] | pause|resume|stop <id> | msg <id> <text> | quit{RESET}"
+        )
+        return True
+
+    claude_id = _find_agent(supervisor, parts[1])
+    if claude_id is None:
+        print(f"{DIM}No unique Claude matches '{parts[1]}'{RESET}")
+    elif command == "pause":
+        supervisor.pause_agent(claude_id)
+    elif command == "resume":
+        supervisor.resume_agent(claude_id)
+    elif command == "stop":
+        await supervisor.stop_agent(claude_id)
+    elif command == "msg" and len(parts) > 2:
+        supervisor.send_message(claude_id, parts[2])
+    return True
+
+
+async def main(args):
+    """run several autonomous Claudes side by side"""
+    supervisor = ClaudeSupervisor(
+        time_scale=args.time_scale,
+        max_model_calls=args.max_model_calls,
+        max_kernels=args.max_kernels,
+    )
+
+    personality = PERSONALITIES.get(args.personality, PERSONALITIES["1"])
+    for claude_id in args.resume or []:
+        await supervisor.start_agent(personality, claude_id, args.turns)
+    for _ in range(args.agents):
+        await supervisor.start_agent(personality, max_turns=args.turns)
+
+    for row in supervisor.status():
+        print(f"{GREEN}✓ Claude ID: {row['claude_id']}{RESET}")
+    print(f"{DIM}Type 'help' for commands.{RESET}\n")
+
+    # Read console commands without blocking the event loop
+    loop = asyncio.get_running_loop()
+    commands: asyncio.Queue = asyncio.Queue()
+
+    def read_command():
+        line = sys.stdin.readline()
+        if not line:
+            # EOF (stdin closed or redirected): stop reading, agents keep running
+            loop.remove_reader(sys.stdin.fileno())
+            return
+        commands.put_nowait(line)
+
+    loop.add_reader(sys.stdin.fileno(), read_command)
+
+    try:
+        all_done = asyncio.create_task(supervisor.wait())
+        while not all_done.done():
+            get_line = asyncio.create_task(commands.get())
+            await asyncio.wait(
+                {get_line, all_done}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not get_line.done():
+                get_line.cancel()
+                break
+            if not await handle_command(supervisor, get_line.result()):
+                break
+    finally:
+        loop.remove_reader(sys.stdin.fileno())
+        await supervisor.stop_all()
+
+    print(f"\n{GREEN}✓ All Claudes ended{RESET}\n")
+
+
+if __name__ == "__main__":
+
+    # Usage:
+    # python supervisor.py --agents 3 --turns 10
+    # python supervisor.py --resume <claude_id> <claude_id> --max-model-calls 4
+
+    if not check_and_setup_env():
+        print("❌ Environment setup failed. Exiting...")
+        exit(1)
+
+    parser = argparse.ArgumentParser(description="Sentient Claude supervisor")
+    parser.add_argument("--agents", type=int, default=2, help="New Claudes to start")
+    parser.add_argument("--resume", nargs="*", help="Existing claude_ids to wake")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per Claude")
+    parser.add_argument(
+        "--personality",
+        default="1",
+        choices=sorted(PERSONALITIES),
+        help="Personality preset",
+    )
+    parser.add_argument(
+        "--time-scale", type=int, default=60, help="Real seconds per Claude hour"
+    )
+    parser.add_argument(
+        "--max-model-calls", type=int, help="Concurrent model calls budget"
+    )
+    parser.add_argument(
+        "--max-kernels", type=int, help="Concurrent kernel executions budget"
+    )
+    args = parser.parse_args()
+
+    async def run():
+        cleanup_task = await startup()
+        try:
+            await main(args)
+        finally:
+            shutdown(cleanup_task)
+            await close_clients()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n🛑 Stopped by user")
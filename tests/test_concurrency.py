@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+import utils.concurrency as concurrency
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(concurrency, "_LIMITS", dict(concurrency._LIMITS))
+
+
+def test_lowering_the_limit_counts_slots_already_held(limits):
+    async def scenario():
+        concurrency.configure_limits(kernels=4)
+        releases = [await concurrency.acquire_slot("kernels") for _ in range(3)]
+        concurrency.configure_limits(kernels=2)
+
+        waiter = asyncio.create_task(concurrency.acquire_slot("kernels"))
+        await asyncio.sleep(0.01)
+        releases.pop()()
+        await asyncio.sleep(0.01)
+        # Two slots still held: the budget of two is full
+        assert not waiter.done()
+
+        releases.pop()()
+        release = await asyncio.wait_for(waiter, 1)
+        release()
+        releases.pop()()
+
+    asyncio.run(scenario())
+
+
+def test_raising_the_limit_admits_waiters_and_cancelled_waiters_leave(limits):
+    async def scenario():
+        concurrency.configure_limits(model_calls=1)
+        release = await concurrency.acquire_slot("model_calls")
+        cancelled = asyncio.create_task(concurrency.acquire_slot("model_calls"))
+        waiter = asyncio.create_task(concurrency.acquire_slot("model_calls"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+
+        concurrency.configure_limits(model_calls=2)
+        (await asyncio.wait_for(waiter, 1))()
+        release()
+        # Both slots are free again
+        releases = [await concurrency.acquire_slot("model_calls") for _ in range(2)]
+        for release in releases:
+            release()
+
+    asyncio.run(scenario())
@@ -0,0 +1,82 @@
+import pytest
+
+pytest.importorskip("lxml")
+
+from browser._md_convert import HtmlConverter
+
+FRAMESET = (
+    "<html><head><title>Frames</title></head>"
+    "<frameset><frame src='nav.html'>"
+    "<noframes>Your browser does not support frames</noframes>"
+    "</frameset></html>"
+)
+
+SAMPLE_PAGES = {
+    "article": """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Tea &amp; Coffee</title>
+<style>body { color: red; }</style><script>var x = "<p>not text</p>";</script>
+</head><body>
+<header><nav><ul><li><a href="/">Home</a></li><li><a href="/blog">Blog</a></li></ul></nav></header>
+<main><article>
+<h1>Tea &amp; Coffee</h1>
+<p>Both are <em>brewed</em> drinks, see <a href="https://example.com/tea" title="Tea">tea</a>
+and <strong>coffee</strong>.<br>Prices &lt; 5&euro;.</p>
+<!-- a comment -->
+<h2>Steps</h2>
+<ol><li>Boil water</li><li>Steep for <code>3 min</code></li></ol>
+<pre><code>def brew(leaves):
+    return leaves * 2
+</code></pre>
+<blockquote><p>Tea is liquid wisdom.</p></blockquote>
+<img src="data:image/png;base64,iVBORw0KGgo=" alt="cup"> <img src="/cup.png" alt="Cup" title="A cup">
+</article></main>
+<footer><p>&copy; 2024 Example</p></footer>
+</body></html>""",
+    "table": """<html><head><title>Results</title></head><body>
+<div id="content" class="page">
+<table><thead><tr><th>Name</th><th>Score</th></tr></thead>
+<tbody><tr><td>Ada</td><td>9_1</td></tr><tr><td>Bob *B*</td><td>7</td></tr></tbody></table>
+<ul><li>one<ul><li>nested</li></ul></li><li>two</li></ul>
+<p>Line one<br/>line two</p><hr><h3>Notes</h3><p>Done.</p>
+</div>
+
+<!-- tracking -->
+<script>track("results");</script>
+
+<aside class="sidebar"><a href="/ad">Buy now</a></aside>
+</body></html>""",
+    "no-title": """<html><body><h1>Plain</h1><p>Some <b>bold</b> and <i>italic</i>
+text with a <a href="#frag">fragment link</a>.</p><dl><dt>Term</dt><dd>Definition</dd></dl>
+</body></html>""",
+}
+
+
+@pytest.mark.parametrize("main_content", [True, False])
+def test_lxml_engine_converts_documents_without_body(tmp_path, main_content):
+    page = tmp_path / "frames.html"
+    page.write_text(FRAMESET)
+
+    result = HtmlConverter().convert(
+        str(page),
+        file_extension=".html",
+        html_parser="lxml",
+        main_content=main_content,
+    )
+
+    assert result.title == "Frames"
+    assert "Your browser does not support frames" in result.text_content
+
+
+@pytest.mark.parametrize("name", sorted(SAMPLE_PAGES))
+def test_lxml_engine_without_pruning_matches_html_parser(tmp_path, name):
+    page = tmp_path / f"{name}.html"
+    page.write_text(SAMPLE_PAGES[name])
+    converter = HtmlConverter()
+
+    expected = converter.convert(str(page), file_extension=".html")
+    result = converter.convert(
+        str(page), file_extension=".html", html_parser="lxml", main_content=False
+    )
+
+    assert result.title == expected.title
+    assert result.text_content == expected.text_content
@@ -0,0 +1,130 @@
+import asyncio
+import functools
+import os
+
+import pytest
+
+pytest.importorskip("ipykernel")
+
+import sandbox.kernel as kernel_module
+import sandbox.kernel_resources as kernel_resources
+import utils.files as files
+
+
+@pytest.fixture
+def kernel_dirs(tmp_path, monkeypatch):
+    """Run kernels with their pid, connection and workspace files under tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    pid_dir = str(tmp_path / "process_pids")
+    monkeypatch.setattr(kernel_module, "KERNEL_PID_DIR", pid_dir)
+    monkeypatch.setattr(kernel_resources, "KERNEL_PID_DIR", pid_dir)
+    monkeypatch.setattr(files, "WORK_FOLDER", str(tmp_path / "workspace"))
+    monkeypatch.setattr(kernel_module, "KERNEL_INTERRUPT_GRACE", 5)
+    return tmp_path
+
+
+async def _run(claude_id, *codes, **kwargs):
+    kc = await kernel_module.start_kernel(claude_id)
+    try:
+        return [
+            await kernel_module.execute_code(kc, code, claude_id, **kwargs)
+            for code in codes
+        ]
+    finally:
+        kernel_module.cleanup_user_kernels(claude_id)
+
+
+def test_silent_code_runs_past_the_output_timeout(kernel_dirs):
+    ((results, _, _, metrics),) = asyncio.run(
+        _run(
+            "patient",
+            "import time\ntime.sleep(3)\nprint('fitted')",
+            msg_fetch_timeout=0.5,
+            overall_timeout=1,
+            execution_timeout=20,
+        )
+    )
+    assert not metrics["interrupted"]
+    assert results.startswith("fitted")
+
+
+def test_silent_runaway_code_is_interrupted(kernel_dirs):
+    timed_out, after = asyncio.run(
+        _run(
+            "silent",
+            "import time\nwhile True:\n    time.sleep(0.1)",
+            "print('free again')",
+            msg_fetch_timeout=0.5,
+            overall_timeout=1,
+            execution_timeout=2,
+        )
+    )
+    results, _, _, metrics = timed_out
+    assert metrics["interrupted"]
+    assert "2s time limit" in results
+    # The kernel is no longer busy with the runaway loop
+    assert after[0].startswith("free again")
+    assert not after[3]["interrupted"]
+
+
+def test_printing_code_is_interrupted_at_the_time_limit(kernel_dirs):
+    ((results, _, _, metrics),) = asyncio.run(
+        _run(
+            "printing",
+            "import time\nwhile True:\n    print('tick', flush=True)\n"
+            "    time.sleep(0.2)",
+            execution_timeout=2,
+        )
+    )
+    assert metrics["interrupted"]
+    assert "2s time limit" in results
+    assert metrics["wall_seconds"] < 10
+
+
+def test_kernel_ignoring_interrupts_is_killed(kernel_dirs):
+    ((results, _, _, metrics),) = asyncio.run(
+        _run(
+            "stubborn",
+            "import signal, time\nsignal.signal(signal.SIGINT, signal.SIG_IGN)\n"
+            "while True:\n    time.sleep(0.1)",
+            msg_fetch_timeout=0.5,
+            overall_timeout=1,
+            execution_timeout=2,
+        )
+    )
+    assert metrics["interrupted"]
+    assert "restarted" in results
+    assert not os.path.exists(os.path.join(kernel_module.KERNEL_PID_DIR, "stubborn"))
+
+
+def test_paused_consumer_stalls_the_kernel_once_and_the_model_is_told(
+    kernel_dirs, monkeypatch
+):
+    monkeypatch.setattr(
+        kernel_module,
+        "OutputChunks",
+        functools.partial(kernel_module.OutputChunks, maxsize=4, wait=0.5),
+    )
+
+    async def pause_after_first_output():
+        kc = await kernel_module.start_kernel("paused")
+        try:
+            execution = kernel_module.stream_code(
+                kc,
+                "import time\nfor i in range(40):\n"
+                "    print(i, flush=True)\n    time.sleep(0.02)",
+                "paused",
+            )
+            first = await execution.__anext__()
+            await asyncio.sleep(3)
+            return [first] + [item async for item in execution]
+        finally:
+            kernel_module.cleanup_user_kernels("paused")
+
+    items = asyncio.run(pause_after_first_output())
+    kind, (results, _, _, metrics) = items[-1]
+    assert kind == "result"
+    assert "39" in results
+    assert "bytes of this output were not shown to the user" in results
+    assert any("skipped while catching up" in value for _, value in items[1:-1])
+    assert metrics["wall_seconds"] < 2.5
@@ -0,0 +1,57 @@
+import copy
+
+from utils.tokenization import TokenCountCache, token_cutter
+
+
+class CountingTokenizer:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return text.split()
+
+
+def _history(size):
+    messages = []
+    for i in range(size):
+        if i % 3 == 1:
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": [{"type": "tool_use", "id": f"t{i}", "name": "kernel"}],
+                }
+            )
+        elif i % 3 == 2:
+            messages.append(
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": f"t{i - 1}",
+                            "content": f"result {i} " * 20,
+                        }
+                    ],
+                }
+            )
+        else:
+            messages.append({"role": "user", "content": f"message {i}" + " ." * 20})
+    return messages
+
+
+def test_cached_turns_match_uncached_and_only_encode_new_messages():
+    tokenizer = CountingTokenizer()
+    cached, uncached = _history(300), _history(300)
+    cache = TokenCountCache()
+    token_cutter(cached, tokenizer, 2000, cache)
+
+    for turn in range(5):
+        new = {"role": "user", "content": f"turn {turn}" + " ." * 20}
+        cached.append(new)
+        uncached.append(copy.deepcopy(new))
+        tokenizer.calls = 0
+        result = token_cutter(cached, tokenizer, 2000, cache)
+
+        assert result == token_cutter(uncached, CountingTokenizer(), 2000)
+        assert tokenizer.calls == 1
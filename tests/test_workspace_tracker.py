@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+import utils.files as files
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(files, "WORK_FOLDER", str(tmp_path))
+    path = files.ensure_claude_workspace("tracked")
+    for i in range(50):
+        with open(os.path.join(path, f"f{i}.txt"), "w") as f:
+            f.write("x")
+    return path
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_reports_only_what_changed_during_the_execution(workspace, inotify):
+    tracker = files.WorkspaceTracker()
+    if not inotify:
+        tracker._inotify = False
+    tracker.changes("tracked", tracker.begin("tracked"))
+
+    # Another tool rewrites a file between two executions
+    with open(os.path.join(workspace, "f1.txt"), "w") as f:
+        f.write("download")
+
+    before = tracker.begin("tracked")
+    with open(os.path.join(workspace, "f2.txt"), "a") as f:
+        f.write("yy")
+    with open(os.path.join(workspace, "new.txt"), "w") as f:
+        f.write("new")
+    os.rename(os.path.join(workspace, "f3.txt"), os.path.join(workspace, "moved.txt"))
+    os.remove(os.path.join(workspace, "f4.txt"))
+    changes = tracker.changes("tracked", before)
+    tracker.forget("tracked")
+
+    assert changes.created == {"new.txt": 3, "moved.txt": 1}
+    assert changes.modified == {"f2.txt": 3}
@@ -1,15 +1,29 @@
-from utils.files import ensure_claude_workspace
+from utils.files import ensure_claude_workspace, format_size
 from cache.state import RedisStateManager
 from utils.helpers import KERNEL_PID_DIR
+from utils.concurrency import concurrency_slot
 from sandbox.kernel import (
     cleanup_user_kernels,
+    close_kernel_client,
     get_or_create_persistent_kernel,
+    stream_code,
 )
-import asyncio
+from sandbox.kernel_pool import get_kernel_pool
 import os
 import re
 
 
+def format_metrics(metrics: dict) -> str:
+    """One line summary of an execution's ExecutionMetrics"""
+    parts = [f"wall {metrics['wall_seconds']:.2f}s"]
+    if metrics["cpu_seconds"] is not None:
+        parts.append(f"cpu {metrics['cpu_seconds']:.2f}s")
+    if metrics["peak_rss_bytes"] is not None:
+        parts.append(f"peak memory {format_size(metrics['peak_rss_bytes'])}")
+    parts.append(f"output {format_size(metrics['output_bytes'])}")
+    return "\n\n[Execution: " + ", ".join(parts) + "]"
+
+
 def extract_filenames_from_code(code: str) -> list[str]:
     patterns = [
         r'\.read[_a-z]*\([\'"]([^/\'"]+\.[a-z0-9]+)[\'"]',
@@ -56,7 +70,21 @@ async def optimistic_kernel_cleanup(redis_state: RedisStateManager):
         print(f"❌ Error in optimistic cleanup: {e}")
 
 
-async def kernel(code: str, filenames: list[str] = None, *, claude_id: str) -> str:
+def _kernel_result(result: str, content: str, max_tokens: int, stream_id: str):
+    return {
+        "type": "tool_result",
+        "toolName": "kernel",
+        "result": result,
+        "content": content,
+        "sources": [],
+        "tokens": max_tokens,
+        "stream_id": stream_id,
+    }
+
+
+async def kernel(
+    code: str, filenames: list[str] = None, *, claude_id: str, stream_id: str = None
+):
     """write python code enclosed in triple backtick markdown code blocks. all python code must be valid and executable in a Jupyter Python 3 kernel environment. ALWAYS reference files in code with their filenames only NEVER absolute file paths! Example: Use pd.read_csv('data.csv') NOT pd.read_csv('workspace/user/data.csv') - the kernel runs in your user directory so files are already accessible by filename alone! ALWAYS add print at the end of the code. Print successful execution of the code and the result. If the result of the function is 'status': 'error', explain to user what happened and immediately rewrite the code and relaunch the function. All file operations should use ONLY filenames without paths (e.g., 'data.csv' not '/path/to/data.csv'). CRITICAL: explicitly save any data that needs to persist (e.g., df.to_excel('output.xlsx'), plt.savefig('plot.png')) as objects in memory are lost after execution.
     #parameters:
     code: the python code to execute - remember that you have to send in full executable code.
@@ -68,15 +96,19 @@ async def kernel(code: str, filenames: list[str] = None, *, claude_id: str) -> s
     await optimistic_kernel_cleanup(redis_state)
 
     if not redis_state.acquire_kernel_lock(claude_id, 30):
-        return "Another request is using kernel, try again", "", [], max_tokens
+        yield _kernel_result(
+            "Another request is using kernel, try again", "", max_tokens, stream_id
+        )
+        return
 
     if any(path in code for path in ["workspace/", "/tmp/"]):
-        return (
+        yield _kernel_result(
             f"ERROR: Code contains absolute file paths. Use ONLY filenames (e.g., 'data.csv') NOT absolute paths (e.g., 'workspace/user/data.csv'). The kernel runs in your user directory so files are accessible by filename alone. Please rewrite your code using only filenames.",
             "",
-            [],
             max_tokens,
+            stream_id,
         )
+        return
 
     auto_extracted = extract_filenames_from_code(code)
 
@@ -98,23 +130,57 @@ async def kernel(code: str, filenames: list[str] = None, *, claude_id: str) -> s
     user_workspace = ensure_claude_workspace(claude_id)
 
     try:
-        kc, flusher_task = await get_or_create_persistent_kernel(claude_id)
-
-        await asyncio.to_thread(kc.execute, code)
-        results, output, file_list = await flusher_task
+        async with concurrency_slot("kernels"):
+            kc = await get_or_create_persistent_kernel(claude_id, get_kernel_pool())
+        # stdout / stderr go out as tool_progress while the code runs
+        execution = stream_code(kc, code, claude_id)
+        stopped = False
+        try:
+            async for kind, value in execution:
+                if stream_id and not redis_state.get_streaming_state(
+                    claude_id, stream_id
+                ):
+                    stopped = True
+                    break
+                if kind == "output":
+                    yield {
+                        "type": "tool_progress",
+                        "toolName": "kernel",
+                        "progress": value,
+                        "stream_id": stream_id,
+                    }
+                elif kind == "result":
+                    results, output, file_list, metrics = value
+        finally:
+            # Interrupts the kernel if the code is still running
+            await execution.aclose()
+        if stopped:
+            yield {"type": "endOfMessage", "sources": [], "stream_id": stream_id}
+            return
 
         ###extend redis
         redis_state.extend_kernel_ttl(claude_id, 120)
+        redis_state.record_kernel_metrics(claude_id, metrics)
         ###return - now includes file_list in results
         files_info = ""
         if file_list:
-            files_info = "\n\nFiles generated:\n" + "\n".join(
-                [f"- {f['name']} ({f['type']})" for f in file_list]
+            files_info = "\n\nFiles generated or modified:\n" + "\n".join(
+                [
+                    f"- {f['name']} ({f['type']}, {f['status']}, {format_size(f['size'])})"
+                    for f in file_list
+                ]
             )
-        return results + files_info, output, [], max_tokens
+        yield _kernel_result(
+            results + files_info + format_metrics(metrics),
+            output,
+            max_tokens,
+            stream_id,
+        )
 
     except Exception as e:
         print(f"❌ DEBUG: Exception in kernel execution: {e}")
-        return f"kernel failed: {e}", "", [], max_tokens
+        # Reconnect next time rather than reuse a client in an unknown state
+        close_kernel_client(claude_id)
+        yield _kernel_result(f"kernel failed: {e}", "", max_tokens, stream_id)
     finally:
         redis_state.release_kernel_lock(claude_id)
@@ -1,13 +1,17 @@
 from browser.browser_manager import BrowserManager
 from browser._md_convert import MarkdownConverter
+from browser._http import get_http_session
 from utils.files import ensure_claude_workspace, get_file_
 from utils.helpers import tokenizer
 from urllib.parse import urlparse
 import mimetypes
-import requests
 import re
 import os
 
+# Seconds to connect / read for downloads and Wayback Machine lookups
+DOWNLOAD_TIMEOUT = (10, 120)
+ARCHIVE_API_TIMEOUT = (10, 30)
+
 browser_manager = BrowserManager()
 
 ##############################################################################################################
@@ -20,23 +24,23 @@ def web_search(query: str, filter_year: int, *, claude_id: str) -> str:
     filter_year: an optional year filter (e.g., 2020)
     """
     max_tokens = 60000
-    browser = browser_manager.get_browser(claude_id)
-    browser.visit_page(f"google: {query}", filter_year=None)
-    header, content = browser._state()
-    result = header.strip() + "\n=======================\n" + content
-    pattern = re.compile(r"\[[^\]]+\]\(([^)]+)\)")
-    sources = []
-    for match in pattern.finditer(content):
-        url = match.group(1)
-        sources.append(
-            {
-                "url": url,
-                "source": url,
-                "page": None,
-                "image_path": None,
-            }
-        )
-    return result, result, sources, max_tokens
+    with browser_manager.lease(claude_id) as browser:
+        browser.visit_page(f"google: {query}", filter_year=None)
+        header, content = browser._state()
+        result = header.strip() + "\n=======================\n" + content
+        pattern = re.compile(r"\[[^\]]+\]\(([^)]+)\)")
+        sources = []
+        for match in pattern.finditer(content):
+            url = match.group(1)
+            sources.append(
+                {
+                    "url": url,
+                    "source": url,
+                    "page": None,
+                    "image_path": None,
+                }
+            )
+        return result, result, sources, max_tokens
 
 
 def visit_url(url: str, *, claude_id: str) -> str:
@@ -45,20 +49,20 @@ def visit_url(url: str, *, claude_id: str) -> str:
     url: the relative or absolute url of the webapge to visit
     """
     max_tokens = 60000
-    browser = browser_manager.get_browser(claude_id)
-    browser.visit_page(url)
-    sources = []
-    header, content = browser._state()
-    sources.append(
-        {
-            "url": url,
-            "source": url,
-            "page": None,
-            "image_path": None,
-        }
-    )
-    result = header.strip() + "\n=======================\n" + content
-    return result, result, sources, max_tokens
+    with browser_manager.lease(claude_id) as browser:
+        browser.visit_page(url)
+        sources = []
+        header, content = browser._state()
+        sources.append(
+            {
+                "url": url,
+                "source": url,
+                "page": None,
+                "image_path": None,
+            }
+        )
+        result = header.strip() + "\n=======================\n" + content
+        return result, result, sources, max_tokens
 
 
 def download_from_url(url: str, *, claude_id: str) -> str:
@@ -69,7 +73,7 @@ def download_from_url(url: str, *, claude_id: str) -> str:
     max_tokens = 60000
     if "arxiv" in url:
         url = url.replace("abs", "pdf")
-    response = requests.get(url)
+    response = get_http_session().get(url, timeout=DOWNLOAD_TIMEOUT)
 
     # Try to get extension from URL first
     url_path = urlparse(url).path
@@ -105,11 +109,11 @@ def archive_search(url: str, date: str, *, claude_id: str) -> str:
     date: The desired date in 'YYYYMMDD' format.
     """
     max_tokens = 60000
-    browser = browser_manager.get_browser(claude_id)
     base_api = f"https://archive.org/wayback/available?url={url}"
     archive_api = base_api + f"&timestamp={date}"
-    res_with_ts = requests.get(archive_api).json()
-    res_without_ts = requests.get(base_api).json()
+    session = get_http_session()
+    res_with_ts = session.get(archive_api, timeout=ARCHIVE_API_TIMEOUT).json()
+    res_without_ts = session.get(base_api, timeout=ARCHIVE_API_TIMEOUT).json()
     sources = []
     sources.append(
         {
@@ -137,41 +141,42 @@ def archive_search(url: str, date: str, *, claude_id: str) -> str:
             sources,
             max_tokens,
         )
-    target_url = closest["url"]
-    browser.visit_page(target_url)
-    header, content = browser._state()
-    result = (
-        f"web archive for url {url}, snapshot on {closest['timestamp'][:8]}:\n"
-        + header.strip()
-        + "\n=======================\n"
-        + content
-    )
-    return (
-        result,
-        result,
-        sources,
-        max_tokens,
-    )
+    with browser_manager.lease(claude_id) as browser:
+        target_url = closest["url"]
+        browser.visit_page(target_url)
+        header, content = browser._state()
+        result = (
+            f"web archive for url {url}, snapshot on {closest['timestamp'][:8]}:\n"
+            + header.strip()
+            + "\n=======================\n"
+            + content
+        )
+        return (
+            result,
+            result,
+            sources,
+            max_tokens,
+        )
 
 
 def page_up(claude_id: str) -> str:
     """Scroll up one page."""
     max_tokens = 60000
-    browser = browser_manager.get_browser(claude_id)
-    browser.page_up()
-    header, content = browser._state()
-    result = header.strip() + "\n=======================\n" + content
-    return result, result, [], max_tokens
+    with browser_manager.lease(claude_id) as browser:
+        browser.page_up()
+        header, content = browser._state()
+        result = header.strip() + "\n=======================\n" + content
+        return result, result, [], max_tokens
 
 
 def page_down(claude_id: str) -> str:
     """Scroll down one page."""
     max_tokens = 60000
-    browser = browser_manager.get_browser(claude_id)
-    browser.page_down()
-    header, content = browser._state()
-    result = header.strip() + "\n=======================\n" + content
-    return result, result, [], max_tokens
+    with browser_manager.lease(claude_id) as browser:
+        browser.page_down()
+        header, content = browser._state()
+        result = header.strip() + "\n=======================\n" + content
+        return result, result, [], max_tokens
 
 
 def find_on_page(search_string: str, *, claude_id: str) -> str:
@@ -180,52 +185,69 @@ def find_on_page(search_string: str, *, claude_id: str) -> str:
     search_string: The string to search for; supports wildcards like '*'
     """
     max_tokens = 60000
-    browser = browser_manager.get_browser(claude_id)
-    result = browser.find_on_page(search_string)
-    header, content = browser._state()
-    if result is None:
-        return (
-            (
-                header.strip()
-                + f"\n=======================\nThe search string '{search_string}' was not found on this page."
-            ),
-            "",
-            [],
-            max_tokens,
-        )
-    end_result = header.strip() + "\n=======================\n" + content
-    return end_result, end_result, [], max_tokens
+    with browser_manager.lease(claude_id) as browser:
+        result = browser.find_on_page(search_string)
+        header, content = browser._state()
+        if result is None:
+            return (
+                (
+                    header.strip()
+                    + f"\n=======================\nThe search string '{search_string}' was not found on this page."
+                ),
+                "",
+                [],
+                max_tokens,
+            )
+        end_result = header.strip() + "\n=======================\n" + content
+        return end_result, end_result, [], max_tokens
 
 
 def find_next(claude_id: str) -> str:
     """Find next ocurrence."""
     max_tokens = 60000
-    browser = browser_manager.get_browser(claude_id)
-    result = browser.find_next()
-    header, content = browser._state()
-    if result is None:
+    with browser_manager.lease(claude_id) as browser:
+        result = browser.find_next()
+        header, content = browser._state()
+        if result is None:
+            return (
+                (
+                    header.strip()
+                    + "\n=======================\nNo further occurrences found."
+                ),
+                "",
+                [],
+                max_tokens,
+            )
+        end_result = header.strip() + "\n=======================\n" + content
         return (
-            (
-                header.strip()
-                + "\n=======================\nNo further occurrences found."
-            ),
-            "",
+            end_result,
+            end_result,
             [],
             max_tokens,
         )
-    end_result = header.strip() + "\n=======================\n" + content
-    return (
-        end_result,
-        end_result,
-        [],
-        max_tokens,
-    )
 
 
-def text_file(file: str, *, claude_id: str) -> str:
-    """use this tool on files you download. this tool converts the following files to markdown for you to review. it can convert these file extensions [".html", ".htm", ".xlsx", ".pptx", ".wav", ".mp3", ".flac", ".pdf", ".docx"], and all other types of text files. IT DOES NOT HANDLE IMAGES.
+def _parse_pages(pages: str):
+    """Parse "12", "5-12" or "5-" into (first, last); last is None when open-ended"""
+    m = re.fullmatch(r"\s*(\d+)\s*(?:(-)\s*(\d+)?)?\s*", pages)
+    if m is None:
+        raise ValueError(
+            f'Invalid page range: {pages!r}. Use e.g. "5", "5-12" or "5-".'
+        )
+    first = int(m.group(1))
+    if m.group(2) is None:
+        return first, first
+    return first, int(m.group(3)) if m.group(3) else None
+
+
+def text_file(
+    file: str, pages: str = None, summary: str = None, *, claude_id: str
+) -> str:
+    """use this tool on files you download. this tool converts the following files to markdown for you to review. it can convert these file extensions [".html", ".htm", ".xlsx", ".pptx", ".wav", ".mp3", ".flac", ".pdf", ".docx"], and all other types of text files. IT DOES NOT HANDLE IMAGES. Long pdfs are returned a range of pages at a time.
     #parameters:
     file: filename which u downloaded
+    pages: optional, pdf only: the pages to read, e.g. "5-12", "5-" (from page 5 on) or "7". Defaults to reading from the first page.
+    summary: optional, spreadsheets only: "true" to get each sheet's shape, column types and first/last rows instead of the full table. Large sheets are otherwise cut to their first rows.
     """
     md_converter = MarkdownConverter()
     max_tokens = 60000
@@ -238,7 +260,13 @@ def text_file(file: str, *, claude_id: str) -> str:
         ext = ext.lower()
         if ext in [".webp", ".png", ".jpeg", ".jpg"]:
             return "Use vision instead for image files.", "", "", 5000
-        result = md_converter.convert_local(file_path)
+        # PDFs are extracted page by page, only until the token budget is filled
+        result = md_converter.convert_local(
+            file_path,
+            page_range=_parse_pages(pages) if pages else None,
+            max_tokens=max_tokens,
+            spreadsheet_summary=str(summary).lower() in ("true", "1", "yes"),
+        )
         text = result.text_content
         text_tokens = tokenizer.encode(text)
         current_token_count = len(text_tokens)
@@ -247,6 +275,8 @@ def text_file(file: str, *, claude_id: str) -> str:
             trimmed_text = tokenizer.decode(text_tokens)
         else:
             trimmed_text = text
+        if result.page_count is not None:
+            trimmed_text += _page_note(result, current_token_count > max_tokens)
         return (
             "document content: " + trimmed_text,
             "document content: " + trimmed_text,
@@ -255,3 +285,19 @@ def text_file(file: str, *, claude_id: str) -> str:
         )
     except Exception as e:
         return f"{e}", "", [], max_tokens
+
+
+def _page_note(result, truncated: bool) -> str:
+    """Which pdf pages were returned, and how to read on"""
+    if result.page_range is None:
+        return (
+            f"\n\n[No pages in that range: the document has {result.page_count} pages.]"
+        )
+    first, last = result.page_range
+    shown = f"Page {first}" if first == last else f"Pages {first}-{last}"
+    note = f"\n\n[{shown} of {result.page_count}"
+    if truncated:
+        note += f", page {last} cut off by the output limit"
+    if last < result.page_count:
+        note += f'. To read on, call text_file with pages="{last + 1}-"'
+    return note + ".]"
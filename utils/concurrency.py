@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Optional
+from collections import deque
+import functools
+import asyncio
+import weakref
+import os
+
+############################################################################################################
+##process-wide concurrency budgets shared by every agent running in this process
+
+_LIMITS: Dict[str, int] = {
+    "model_calls": int(os.getenv("MAX_CONCURRENT_MODEL_CALLS", "8")),
+    "kernels": int(os.getenv("MAX_CONCURRENT_KERNELS", "4")),
+}
+
+# Blocking tools run on a shared thread pool; each tool also has its own cap
+TOOL_THREADS = int(os.getenv("TOOL_THREADS", "16"))
+TOOL_LIMITS: Dict[str, int] = {
+    "web_search": 4,
+    "visit_url": 8,
+    "download_from_url": 4,
+    "archive_search": 4,
+    "text_file": 4,
+}
+DEFAULT_TOOL_LIMIT = 8
+
+_tool_executor: Optional[ThreadPoolExecutor] = None
+
+# asyncio primitives are bound to the loop that uses them, so keep one set per loop
+_semaphores = weakref.WeakKeyDictionary()
+
+
+class _Budget:
+    """
+    Counting semaphore for one event loop whose limit can change while slots are
+    held. Lowering the limit takes no slot back: new holders wait until the slots
+    held drop below it. Waiters are served first come, first served.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.held = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.held < self.limit and not self._waiters:
+            self.held += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if not waiter.cancelled():
+                # Granted just as its task was cancelled: pass the slot on
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        self.held -= 1
+        self._wake()
+
+    def resize(self, limit: int) -> None:
+        self.limit = limit
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.held < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.held += 1
+                waiter.set_result(None)
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+def configure_limits(
+    model_calls: Optional[int] = None, kernels: Optional[int] = None
+) -> None:
+    """
+    Set the global budget of concurrent model calls / kernel executions.
+
+    Budgets already in use are resized in place, so slots held at the time count
+    against the new limit.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    for name, value in (("model_calls", model_calls), ("kernels", kernels)):
+        if value is None:
+            continue
+        if value < 1:
+            raise ValueError(f"Concurrency limit for {name} must be >= 1")
+        _LIMITS[name] = value
+        for loop, loop_semaphores in list(_semaphores.items()):
+            budget = loop_semaphores.get(name)
+            if budget is None:
+                continue
+            if loop is running:
+                budget.resize(value)
+            elif not loop.is_closed():
+                # Waiters may only be woken from their own loop's thread
+                loop.call_soon_threadsafe(budget.resize, value)
+
+
+def get_limit(name: str) -> int:
+    """Current budget for a named resource"""
+    return _LIMITS[name]
+
+
+def _get_semaphore(name: str, limit: int) -> _Budget:
+    loop = asyncio.get_running_loop()
+    loop_semaphores = _semaphores.setdefault(loop, {})
+    semaphore = loop_semaphores.get(name)
+    if semaphore is None:
+        semaphore = _Budget(limit)
+        loop_semaphores[name] = semaphore
+    return semaphore
+
+
+@asynccontextmanager
+async def concurrency_slot(name: str):
+    """Hold one slot of the named budget for the duration of the block"""
+    async with _get_semaphore(name, _LIMITS[name]):
+        yield
+
+
+async def acquire_slot(name: str) -> Callable[[], None]:
+    """
+    Take one slot of the named budget and return the function that gives it back,
+    for slots held beyond a single block (e.g. until a stream is read). Calling the
+    function more than once releases the slot only once.
+    """
+    semaphore = _get_semaphore(name, _LIMITS[name])
+    await semaphore.acquire()
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            semaphore.release()
+
+    return release
+
+
+def _get_tool_executor() -> ThreadPoolExecutor:
+    global _tool_executor
+    if _tool_executor is None:
+        _tool_executor = ThreadPoolExecutor(
+            max_workers=TOOL_THREADS, thread_name_prefix="tool"
+        )
+    return _tool_executor
+
+
+async def run_sync_tool(name: str, func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking tool on the tool thread pool, within its per-tool limit"""
+    limit = TOOL_LIMITS.get(name, DEFAULT_TOOL_LIMIT)
+    async with _get_semaphore(f"tool:{name}", limit):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_tool_executor(), functools.partial(func, *args, **kwargs)
+        )
+
+
+def shutdown_tool_executor() -> None:
+    """Stop the tool thread pool without waiting for in-flight requests"""
+    global _tool_executor
+    if _tool_executor is not None:
+        _tool_executor.shutdown(wait=False, cancel_futures=True)
+        _tool_executor = None
+
+
+#########################################
@@ -1,6 +1,23 @@
 from utils.helpers import WORK_FOLDER
 from dotenv import load_dotenv
-from typing import List, Optional
+from utils._inotify import (
+    IN_CLOSE_WRITE,
+    IN_DELETE_SELF,
+    IN_MOVED_FROM,
+    IN_Q_OVERFLOW,
+    IN_MOVE_SELF,
+    IN_MOVED_TO,
+    IN_IGNORED,
+    IN_ONLYDIR,
+    IN_CREATE,
+    IN_DELETE,
+    IN_MODIFY,
+    IN_ATTRIB,
+    Inotify,
+)
+from typing import Dict, List, Optional, Set, Tuple
+from stat import S_ISDIR, S_ISREG
+import threading
 import os
 
 
@@ -57,3 +74,221 @@ def get_file_list(claude_id: str) -> List[str]:
         if os.path.isfile(os.path.join(claude_workspace, item))
     ]
     return files
+
+
+def format_size(size: int) -> str:
+    """Human readable file size"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class WorkspaceChanges:
+    """Files created or modified in a workspace, with their sizes in bytes"""
+
+    def __init__(self, created: Dict[str, int], modified: Dict[str, int]):
+        self.created = created
+        self.modified = modified
+
+    def __bool__(self) -> bool:
+        return bool(self.created or self.modified)
+
+    def describe(self) -> str:
+        parts = []
+        for label, files in (("Created", self.created), ("Modified", self.modified)):
+            if files:
+                names = ", ".join(
+                    f"{name} ({format_size(size)})" for name, size in files.items()
+                )
+                parts.append(f"{label} {len(files)} file(s): {names}")
+        return "\n".join(parts)
+
+
+class _Watch:
+    """inotify watch on one workspace and the snapshot it keeps current"""
+
+    def __init__(self, wd: int, workspace: str):
+        self.wd = wd
+        self.workspace = workspace
+        self.snapshot: Dict[str, Tuple[int, int]] = {}
+        self.dirty: Set[str] = set()
+        self.stale = True
+
+
+class WorkspaceTracker:
+    """
+    Detects files created or modified in a Claude workspace by an execution.
+
+    A snapshot maps each top-level entry to its (mtime_ns, size). On Linux each
+    workspace gets an inotify watch, and its snapshot is kept as a baseline that
+    only re-stats the entries named in events: writes by other tools between
+    executions are folded into the baseline by begin(), and changes() stats just
+    the entries touched since. Without inotify, or after the event queue
+    overflowed, the workspace is scanned with os.scandir instead.
+    """
+
+    WATCH_MASK = (
+        IN_CREATE
+        | IN_MODIFY
+        | IN_ATTRIB
+        | IN_CLOSE_WRITE
+        | IN_MOVED_FROM
+        | IN_MOVED_TO
+        | IN_DELETE
+        | IN_DELETE_SELF
+        | IN_MOVE_SELF
+        | IN_ONLYDIR
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inotify = None
+        self._watches: Dict[str, _Watch] = {}
+        self._by_wd: Dict[int, _Watch] = {}
+
+    def _scan(self, workspace: str) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        with os.scandir(workspace) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        snapshot[entry.name] = (0, 0)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    continue
+        return snapshot
+
+    def _stat(self, path: str) -> Optional[Tuple[int, int]]:
+        # Same view of an entry as _scan: directories without state, files only
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if S_ISDIR(stat.st_mode):
+            return (0, 0)
+        if S_ISREG(stat.st_mode):
+            return (stat.st_mtime_ns, stat.st_size)
+        return None
+
+    def _watch(self, claude_id: str, workspace: str) -> Optional[_Watch]:
+        watch = self._watches.get(claude_id)
+        if watch is not None:
+            return watch
+        if self._inotify is None:
+            try:
+                self._inotify = Inotify()
+            except (OSError, AttributeError):
+                self._inotify = False
+        if not self._inotify:
+            return None
+        try:
+            wd = self._inotify.add_watch(workspace, self.WATCH_MASK)
+        except OSError:
+            return None  # out of watches: this workspace is scanned
+        watch = self._watches[claude_id] = self._by_wd[wd] = _Watch(wd, workspace)
+        return watch
+
+    def _drain(self) -> None:
+        if not self._inotify:
+            return
+        for wd, mask, name in self._inotify.read():
+            if mask & IN_Q_OVERFLOW:
+                for watch in self._watches.values():
+                    watch.stale = True
+                continue
+            watch = self._by_wd.get(wd)
+            if watch is None:
+                continue
+            if mask & IN_IGNORED:
+                # Workspace removed or moved: watch it again on next use
+                self._drop(watch)
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                watch.stale = True
+            elif name:
+                watch.dirty.add(name)
+
+    def _drop(self, watch: _Watch) -> None:
+        self._by_wd.pop(watch.wd, None)
+        for claude_id, known in list(self._watches.items()):
+            if known is watch:
+                del self._watches[claude_id]
+
+    def _sync(self, watch: _Watch) -> Set[str]:
+        """Bring the snapshot up to date; returns the entries that may have changed"""
+        if watch.stale:
+            # The directory may have been replaced: watch what the path names now
+            try:
+                wd = self._inotify.add_watch(watch.workspace, self.WATCH_MASK)
+            except OSError:
+                self._drop(watch)
+                self._inotify.rm_watch(watch.wd)
+                wd = watch.wd
+            if wd != watch.wd:
+                self._inotify.rm_watch(watch.wd)
+                self._by_wd.pop(watch.wd, None)
+                watch.wd, self._by_wd[wd] = wd, watch
+            watch.dirty.clear()
+            watch.stale = False
+            watch.snapshot = self._scan(watch.workspace)
+            return set(watch.snapshot)
+        names, watch.dirty = watch.dirty, set()
+        for name in names:
+            state = self._stat(os.path.join(watch.workspace, name))
+            if state is None:
+                watch.snapshot.pop(name, None)
+            else:
+                watch.snapshot[name] = state
+        return names
+
+    def begin(self, claude_id: str) -> Dict[str, Tuple[int, int]]:
+        """Snapshot of the workspace before an execution"""
+        workspace = ensure_claude_workspace(claude_id)
+        with self._lock:
+            watch = self._watch(claude_id, workspace)
+            if watch is None:
+                return self._scan(workspace)
+            self._drain()
+            if self._watches.get(claude_id) is not watch:
+                return self._scan(workspace)
+            self._sync(watch)
+            return dict(watch.snapshot)
+
+    def changes(
+        self, claude_id: str, before: Dict[str, Tuple[int, int]]
+    ) -> WorkspaceChanges:
+        """Entries created or modified since the before snapshot"""
+        workspace = ensure_claude_workspace(claude_id)
+        with self._lock:
+            self._drain()
+            watch = self._watches.get(claude_id)
+            if watch is None:
+                after = self._scan(workspace)
+                names = set(after)
+            else:
+                names = self._sync(watch)
+                after = watch.snapshot
+            created, modified = {}, {}
+            for name in names:
+                state = after.get(name)
+                if state is None:
+                    continue
+                if name not in before:
+                    created[name] = state[1]
+                elif state != before[name]:
+                    modified[name] = state[1]
+        return WorkspaceChanges(created, modified)
+
+    def forget(self, claude_id: str) -> None:
+        """Stop watching a workspace whose kernel was cleaned up"""
+        with self._lock:
+            watch = self._watches.get(claude_id)
+            if watch is not None:
+                self._drop(watch)
+                self._inotify.rm_watch(watch.wd)
+
+
+workspace_tracker = WorkspaceTracker()
@@ -15,6 +15,8 @@ tokenizer = tiktoken.get_encoding("cl100k_base")
 
 WORK_FOLDER = os.path.join(os.getcwd(), "workspace/")
 KERNEL_PID_DIR = os.path.join(os.getcwd(), "process_pids")
+KERNEL_POOL_DIR = os.path.join(os.getcwd(), "kernel_pool")
+WEB_CACHE_DIR = os.path.join(os.getcwd(), "web_cache")
 
 ############################################################################################################
 
@@ -1,11 +1,12 @@
 import asyncio
 from sandbox.kernel import cleanup_user_kernels
+from tools.web_tools_ import browser_manager
 from cache.state import RedisStateManager
 
 
 async def redis_cleanup_listener():
     """
-    Monitor kernel TTLs and cleanup expired kernels.
+    Monitor kernel TTLs and cleanup expired kernels, and drop idle browsers.
     Now using in-memory state manager instead of Redis pub/sub.
     """
     redis_state = RedisStateManager()
@@ -28,6 +29,9 @@ async def redis_cleanup_listener():
                     except Exception as e:
                         print(f"❌ Error cleaning up kernel for {claude_id}: {e}")
 
+            # Browsers of Claudes that stopped browsing, even if no other one browses
+            browser_manager.evict_idle()
+
         except Exception as e:
             print(f"Error in cleanup listener: {e}")
             await asyncio.sleep(1)
@@ -0,0 +1,57 @@
+from typing import List, Optional
+import json
+import time
+
+############################################################################################################
+##stream modes for text (0:) and thinking (g:) frames
+# char     - one frame per character (legacy typewriter effect)
+# delta    - one frame per model delta
+# coalesce - deltas buffered and flushed at most every `interval` seconds
+
+STREAM_MODES = ("char", "delta", "coalesce")
+
+
+class DeltaCoalescer:
+    """Turn text/thinking deltas into stream frames according to the stream mode"""
+
+    def __init__(self, mode: str = "coalesce", interval: float = 0.05):
+        if mode not in STREAM_MODES:
+            raise ValueError(
+                f"Unknown stream mode {mode}, expected one of {STREAM_MODES}"
+            )
+        self.mode = mode
+        self.interval = interval
+        self._prefix: Optional[str] = None
+        self._buffer = ""
+        self._last_flush = time.monotonic()
+
+    def add(self, prefix: str, text: str) -> List[str]:
+        """Frames ready to be yielded for a new delta of the given frame type"""
+        if not text:
+            return []
+        if self.mode == "char":
+            return [f"{prefix}:{json.dumps(char)}\n" for char in text]
+        if self.mode == "delta":
+            return [f"{prefix}:{json.dumps(text)}\n"]
+
+        frames = []
+        if self._prefix is not None and self._prefix != prefix:
+            frames.extend(self.flush())
+        self._prefix = prefix
+        self._buffer += text
+        if time.monotonic() - self._last_flush >= self.interval:
+            frames.extend(self.flush())
+        return frames
+
+    def flush(self) -> List[str]:
+        """Emit whatever is buffered; call before any non-delta frame"""
+        frames = []
+        if self._buffer:
+            frames.append(f"{self._prefix}:{json.dumps(self._buffer)}\n")
+        self._buffer = ""
+        self._prefix = None
+        self._last_flush = time.monotonic()
+        return frames
+
+
+#########################################
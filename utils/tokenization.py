@@ -1,8 +1,118 @@
+from typing import Any, Dict, Optional, Tuple
 import json
 from utils.helpers import tokenizer
 
 
-def token_cutter(messages: list[dict], tokenizer, max_tokens: int) -> list[dict]:
+def _content_text(content: Any) -> str:
+    """Text of a message's content, used to spot memory reminders"""
+    if not isinstance(content, list):
+        return content
+    return " ".join(
+        (
+            block.get("content", "")
+            if isinstance(block, dict) and "content" in block
+            else (
+                block.get("text", "")
+                if isinstance(block, dict) and "text" in block
+                else str(block) if not isinstance(block, dict) else ""
+            )
+        )
+        for block in content
+    )
+
+
+def _first_block(content: Any, block_type: str) -> Optional[dict]:
+    if isinstance(content, list):
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == block_type:
+                return block
+    return None
+
+
+class _MessageInfo:
+    """What token_cutter needs to know about one message, derived once"""
+
+    __slots__ = (
+        "msg",
+        "content",
+        "tokens",
+        "key",
+        "tool_use",
+        "tool_result",
+        "reminder",
+    )
+
+    def __init__(self, msg: dict, tokenizer):
+        role = msg.get("role")
+        content = msg.get("content")
+        encoded = json.dumps(content) if isinstance(content, (dict, list)) else content
+        self.msg = msg
+        self.content = content
+        self.tokens = len(tokenizer.encode(encoded))
+        self.key = (msg.get("role", ""), str(content))
+        # First tool_use / tool_result block, None if there is none
+        self.tool_use = (
+            _first_block(content, "tool_use") if role == "assistant" else None
+        )
+        self.tool_result = (
+            _first_block(content, "tool_result") if role == "user" else None
+        )
+        self.reminder = role == "user" and "<memory-reminder>" in _content_text(
+            msg.get("content", "")
+        )
+
+
+class TokenCountCache:
+    """
+    Token counts, dedup keys and classification per message, kept alongside a
+    loop's history.
+
+    Entries are keyed by message identity and stay valid while the message still
+    holds the same content object, so each turn only encodes and classifies newly
+    appended or rewritten messages. Anything that mutates a message's content in
+    place must call invalidate().
+    """
+
+    def __init__(self):
+        self._entries: Dict[int, _MessageInfo] = {}
+
+    def info(self, msg: dict, tokenizer) -> _MessageInfo:
+        entry = self._entries.get(id(msg))
+        if (
+            entry is None
+            or entry.msg is not msg
+            or entry.content is not msg.get("content")
+        ):
+            entry = self._entries[id(msg)] = _MessageInfo(msg, tokenizer)
+        return entry
+
+    def count(self, msg: dict, tokenizer) -> int:
+        """Token count of a message's content"""
+        return self.info(msg, tokenizer).tokens
+
+    def key(self, msg: dict, tokenizer) -> Tuple[str, str]:
+        """(role, content) key used to skip duplicate messages"""
+        return self.info(msg, tokenizer).key
+
+    def invalidate(self, msg: dict) -> None:
+        self._entries.pop(id(msg), None)
+
+    def prune(self, messages: list[dict]) -> None:
+        """Drop entries for messages no longer in the history"""
+        live = {id(m) for m in messages}
+        for msg_id in [k for k in self._entries if k not in live]:
+            del self._entries[msg_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def token_cutter(
+    messages: list[dict],
+    tokenizer,
+    max_tokens: int,
+    token_cache: Optional[TokenCountCache] = None,
+) -> list[dict]:
     """
     Context window optimizer using priority-based retention.
     Preserves thinking blocks per Anthropic docs.
@@ -11,7 +121,13 @@ def token_cutter(messages: list[dict], tokenizer, max_tokens: int) -> list[dict]
     1. Most recent N messages of each critical type (user, assistant, tool results, mem. reminders)
     2. Older messages until token budget exhausted
     3. tool use calls with results (ALWAYS with thinking blocks if present)
+
+    Pass the same token_cache on every turn so only new messages get encoded.
     """
+    if token_cache is None:
+        token_cache = TokenCountCache()
+    elif len(token_cache) > 2 * len(messages):
+        token_cache.prune(messages)
 
     # Phase 1: Classify and prioritize
     critical = {"user": [], "assistant": [], "results": [], "reminder": []}
@@ -19,49 +135,22 @@ def token_cutter(messages: list[dict], tokenizer, max_tokens: int) -> list[dict]
     tool_use_map = {}  # Map tool_use_id -> assistant message with tool_use
 
     for msg in reversed(messages):  # Most recent first
+        # Classified once per message, then reused from the cache every turn
+        info = token_cache.info(msg, tokenizer)
         role = msg.get("role")
         content = msg.get("content", "")
 
         # Handle assistant messages with tool_use (may include thinking)
-        if role == "assistant" and isinstance(content, list):
-            # Check if contains tool_use block
-            for block in content:
-                if isinstance(block, dict) and block.get("type") == "tool_use":
-                    tool_use_map[block.get("id")] = msg
-                    break
-
-        # Check content for memory reminders (content can be string or list)
-        content_str = content
-        if isinstance(content, list):
-            # Extract text from list of content blocks
-            content_str = " ".join(
-                (
-                    block.get("content", "")
-                    if isinstance(block, dict) and "content" in block
-                    else (
-                        block.get("text", "")
-                        if isinstance(block, dict) and "text" in block
-                        else str(block) if not isinstance(block, dict) else ""
-                    )
-                )
-                for block in content
-            )
+        if info.tool_use is not None:
+            tool_use_map[info.tool_use.get("id")] = msg
 
         # Prioritize tool results
-        if role == "user" and isinstance(content, list):
-            for block in content:
-                if isinstance(block, dict) and block.get("type") == "tool_result":
-                    if len(critical["results"]) < 1:
-                        # print(f"added tool result: {str(msg)[:60]}")
-                        critical["results"].append(msg)
-                    break
+        if info.tool_result is not None and len(critical["results"]) < 1:
+            # print(f"added tool result: {str(msg)[:60]}")
+            critical["results"].append(msg)
 
         # Prioritize memory reminders
-        if (
-            role == "user"
-            and "<memory-reminder>" in content_str
-            and len(critical["reminder"]) < 3
-        ):
+        if info.reminder and len(critical["reminder"]) < 3:
             # print(f"added reminder: {str(msg)[:60]}")
             critical["reminder"].append(msg)
 
@@ -82,25 +171,17 @@ def token_cutter(messages: list[dict], tokenizer, max_tokens: int) -> list[dict]
 
     # Phase 1.5: Pair tool_use with kept tool_results (count tokens together)
     for msg in critical["results"]:
-        content = msg.get("content")
-        if isinstance(content, list):
-            for block in content:
-                if isinstance(block, dict) and block.get("type") == "tool_result":
-                    tool_use_id = block.get("tool_use_id")
-                    if tool_use_id and tool_use_id in tool_use_map:
-                        tool_use_msg = tool_use_map[tool_use_id]
-                        # print(
-                        #     f"added corresponding tool use msg to tool result: {str(tool_use_msg)[:60]}"
-                        # )
-                        critical["assistant"].append(tool_use_msg)
-                    break
+        tool_use_id = token_cache.info(msg, tokenizer).tool_result.get("tool_use_id")
+        if tool_use_id and tool_use_id in tool_use_map:
+            tool_use_msg = tool_use_map[tool_use_id]
+            # print(
+            #     f"added corresponding tool use msg to tool result: {str(tool_use_msg)[:60]}"
+            # )
+            critical["assistant"].append(tool_use_msg)
 
     # Phase 2: Token budget (critical + fill from other)
     def count_tokens(msg):
-        content = msg.get("content")
-        if isinstance(content, (dict, list)):
-            content = json.dumps(content)
-        return len(tokenizer.encode(content))
+        return token_cache.count(msg, tokenizer)
 
     kept_msgs = []
     for tier in critical.values():
@@ -108,13 +189,10 @@ def token_cutter(messages: list[dict], tokenizer, max_tokens: int) -> list[dict]
 
     budget = max(0, max_tokens - sum(count_tokens(m) for m in kept_msgs))
     # print(f"the budget now is {budget}")
-    seen_content = {(m.get("role", ""), str(m.get("content"))) for m in kept_msgs}
+    seen_content = {token_cache.key(m, tokenizer) for m in kept_msgs}
 
     for msg in other:
-        key = (
-            msg.get("role", ""),
-            str(msg.get("content")),
-        )
+        key = token_cache.key(msg, tokenizer)
         if key in seen_content:
             continue
         tokens = count_tokens(msg)
@@ -136,6 +214,7 @@ def token_cutter(messages: list[dict], tokenizer, max_tokens: int) -> list[dict]
                 )
                 if has_tool_result:
                     # Trim oversized tool_result output
+                    trimmed = False
                     for block in content:
                         if (
                             isinstance(block, dict)
@@ -151,8 +230,11 @@ def token_cutter(messages: list[dict], tokenizer, max_tokens: int) -> list[dict]
                                     result_content[:chars_to_keep]
                                     + "\n\n[... output truncated ...]"
                                 )
+                                trimmed = True
 
-                    # Count tokens after trimming
+                    # Count tokens after trimming (content was edited in place)
+                    if trimmed:
+                        token_cache.invalidate(msg)
                     actual_tokens = count_tokens(msg)
 
                     # Only add if trimmed version fits in budget